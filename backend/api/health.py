@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from datetime import datetime
 
+from services.readiness import readiness_report
+
 router = APIRouter()
 
 
@@ -14,6 +16,9 @@ async def health_check():
 
 
 @router.get("/ready")
-async def readiness():
-    """Check dependencies (Redis, optional DB)."""
-    return {"ready": True, "dependencies": {"redis": "optional", "postgres": "optional"}}
+async def readiness(response: Response):
+    """Readiness from cached dependency probes + live solver queue; 503 while warming up or overloaded."""
+    report = readiness_report()
+    if not report["ready"]:
+        response.status_code = 503
+    return report
@@ -1,12 +1,17 @@
 """
 Pharos Network gateway: pool data, network stats.
 Uses real Pharos Testnet (AtlanticOcean) when RPC is available.
+Both endpoints are polled by dashboards: responses carry an ETag (pool snapshot version /
+network stats) and Cache-Control, answer If-None-Match with 304, and large bodies are sent
+gzip / brotli compressed from a cache of rendered bodies.
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Request, Response
 from pydantic import BaseModel
 from typing import Optional
 
+from core.config import settings
+from core.http_cache import BodyCache, cached_response, make_etag
 from services.pharos_fetcher import get_pharos_fetcher
 
 router = APIRouter()
@@ -27,17 +32,40 @@ class NetworkStats(BaseModel):
     gas_price: Optional[int] = None
 
 
-@router.get("/network")
-async def network_status() -> NetworkStats:
-    """Return Pharos testnet connection status and basic stats."""
+_bodies = BodyCache()
+
+
+@router.get("/network", response_model=NetworkStats)
+async def network_status(request: Request) -> Response:
+    """Return Pharos testnet connection status and basic stats (cached PHAROS_NETWORK_CACHE_SECONDS)."""
     fetcher = get_pharos_fetcher()
-    data = await fetcher.get_network_stats()
-    return NetworkStats(**data)
+    data = await fetcher.get_network_stats_cached(settings.PHAROS_NETWORK_CACHE_SECONDS)
+    stats = NetworkStats(**data).model_dump()
+    etag = make_etag("network", sorted(stats.items()))
+    return cached_response(
+        request, etag, settings.PHAROS_NETWORK_CACHE_SECONDS, lambda: _bodies.get(("network", etag), lambda: stats)
+    )
 
 
-@router.get("/pools")
-async def list_pools() -> list[PoolInfo]:
-    """Return cached list of DEX pools (from fetcher or fallback demo data)."""
+@router.get("/pools", response_model=list[PoolInfo])
+async def list_pools(
+    request: Request,
+    token: Optional[str] = Query(None, description="Only pools trading this token (address, case-insensitive)"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, description="Page size (default: all pools)"),
+) -> Response:
+    """Return cached list of DEX pools (from fetcher or fallback demo data); X-Total-Count = pools matching `token`."""
     fetcher = get_pharos_fetcher()
     pools = await fetcher.get_pools()
-    return [PoolInfo(**p) for p in pools]
+    snapshot = fetcher.snapshot_info()
+    # A snapshot is identified by its fetch time and block; the body also depends on the query
+    etag = make_etag("pools", snapshot["fetched_at"], snapshot["block_number"], len(pools), token and token.lower(), offset, limit)
+    max_age = settings.POOL_CACHE_TTL_SECONDS - (snapshot["age_seconds"] or 0)
+    matching = pools
+    if token:
+        key = token.lower()
+        matching = [p for p in pools if any(t.lower() == key for t in p["tokens"])]
+    page = matching[offset: offset + limit if limit else None]
+    return cached_response(
+        request, etag, max_age, lambda: _bodies.get(etag, lambda: page), headers={"X-Total-Count": str(len(matching))}
+    )
@@ -5,41 +5,105 @@ Endpoints (see README "Functions and Algorithms" for algorithms and I/O):
 - POST /arbitrage  — optimal swap path (Arbitrage Pathfinder)
 - POST /scheduler  — transaction schedule (Transaction Scheduler)
 - POST /liquidation — liquidation strategy (Liquidation Optimizer)
+- POST /{arbitrage,scheduler,liquidation}/stream — progressive results as NDJSON or SSE
+- POST /positions, /positions/liquidatable — server-side position book, top-K liquidatable queries
+- POST /stress-test — liquidation book under price-shock scenarios (vectorised health factors)
+- GET  /mempool/schedule — latest schedule of the ingested pending router swaps
+- POST /backtest — replay recorded snapshots and position books (profit / latency totals)
+- WS   /feed — live best path / cycle updates for subscribed token pairs
+- GET  /profiles/hot, /profiles/{id} — sampled solver hot frames, per-request cProfile output
 
 All computations use classical simulators (simulated annealing / QUBO) for PoC.
 """
 
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import Optional
+import asyncio
+import json
+from typing import AsyncIterator, Literal, Optional
 
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+
+from core.config import settings
+from core.logger import logger
+from core.profiling import hot_frames, profile_access, profile_path, profile_summary
+from core.responses import ORJSONResponse
 from services.quantum_simulator import (
     solve_arbitrage,
+    solve_arbitrage_columnar,
     solve_scheduler,
     solve_liquidation,
+    stream_arbitrage,
+    stream_scheduler,
+    stream_liquidation,
 )
 from services.quantum_vision import (
     solve_yield_scheduling,
     solve_pool_risk_classifier,
     solve_prediction_market_amm,
+    solve_prediction_quotes,
 )
+from services import live_feed, mempool
+from services.allocation import solve_capital_allocation
+from services.backtest import solve_backtest
+from services.path_cache import path_cache_stats
+from services.pool_features import get_pool_features
+from services.position_store import get_position_store, solve_liquidatable, solve_position_update
+from services.stress import solve_stress_test
+from services.solver_pool import run_solver, stream_solver
+from services.warmup import is_warm
 from models.quantum import (
+    AllocationRequest,
+    AllocationResponse,
     ArbitrageRequest,
+    ArbitrageColumnarRequest,
     ArbitrageResponse,
+    BacktestRequest,
+    BacktestResponse,
+    FeedSubscription,
     SchedulerRequest,
     SchedulerResponse,
     LiquidationRequest,
     LiquidationResponse,
+    LiquidatableQuery,
+    LiquidatableResponse,
+    PositionBookResponse,
+    PositionBookUpdate,
+    StressTestRequest,
+    StressTestResponse,
     YieldSchedulingRequest,
     YieldSchedulingResponse,
     PoolRiskRequest,
     PoolRiskResponse,
     PredictionMarketRequest,
     PredictionMarketResponse,
+    PredictionQuoteBatchRequest,
+    PredictionQuoteBatchResponse,
 )
 
 router = APIRouter()
 
+StreamFormat = Literal["ndjson", "sse"]
+
+
+def _fast_json(result) -> ORJSONResponse:
+    """Serialize a solver response with orjson directly; FastAPI skips re-validating a returned Response."""
+    return ORJSONResponse(result.model_dump())
+
+
+def _stream_response(events: AsyncIterator[tuple[str, dict]], format: StreamFormat) -> StreamingResponse:
+    """Encode (event, payload) pairs as NDJSON lines ({"event": ..., **payload}) or Server-Sent Events."""
+
+    async def body():
+        async for event, payload in events:
+            if format == "sse":
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            else:
+                yield json.dumps({"event": event, **payload}) + "\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
 
 @router.get("/status")
 async def quantum_status():
@@ -47,7 +111,12 @@ async def quantum_status():
     return {
         "backend": "classical",
         "simulator": "dimod/neal (simulated annealing)",
-        "ready": True,
+        "ready": is_warm(),
+        "path_cache": path_cache_stats(),
+        "feed": live_feed.feed_stats(),
+        "positions": get_position_store().stats(),
+        "mempool": mempool.mempool_stats(),
+        "pool_features": get_pool_features().stats(),
         "message": "Quantum computations are simulated for this prototype.",
     }
 
@@ -55,19 +124,160 @@ async def quantum_status():
 @router.post("/arbitrage", response_model=ArbitrageResponse)
 async def api_arbitrage(req: ArbitrageRequest):
     """Quantum Arbitrage Pathfinder: find optimal path across pools (QUBO + simulated annealing)."""
-    return await solve_arbitrage(req)
+    return _fast_json(await run_solver(solve_arbitrage, req))
+
+
+@router.post("/arbitrage/columnar", response_model=ArbitrageResponse)
+async def api_arbitrage_columnar(req: ArbitrageColumnarRequest):
+    """Arbitrage fast path: pools as parallel arrays (addresses, token index pairs, reserves, fees)."""
+    return _fast_json(await run_solver(solve_arbitrage_columnar, req))
+
+
+@router.websocket("/feed")
+async def ws_feed(ws: WebSocket):
+    """Live arbitrage feed. Send {"action": "subscribe", "kind": "pair"|"cycle", "token_in", "token_out", ...}
+    or {"action": "unsubscribe", "id"}; receive "update" events when a subscribed result changes on a new pool snapshot."""
+    await ws.accept()
+    client = live_feed.FeedClient()
+
+    async def pump():
+        while True:
+            await ws.send_text(json.dumps(await client.queue.get()))
+
+    sender = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                msg = json.loads(await ws.receive_text())
+                action = msg.pop("action", "subscribe") if isinstance(msg, dict) else None
+                if action == "subscribe":
+                    sub = FeedSubscription(**msg)
+                    client.offer({"event": "subscribed", "id": sub.key})
+                    await live_feed.subscribe(client, sub)
+                elif action == "unsubscribe":
+                    live_feed.unsubscribe(client, str(msg.get("id")))
+                    client.offer({"event": "unsubscribed", "id": msg.get("id")})
+                else:
+                    client.offer({"event": "error", "detail": "action must be subscribe or unsubscribe"})
+            except ValidationError as e:
+                client.offer({"event": "error", "detail": e.errors(include_url=False, include_context=False)})
+            except json.JSONDecodeError:
+                client.offer({"event": "error", "detail": "invalid JSON"})
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                # e.g. the pool fetch or the first evaluation failed: the subscription stays registered
+                # and is evaluated again on the next snapshot, so keep the connection open
+                logger.exception("feed message failed")
+                client.offer({"event": "error", "detail": str(e) or type(e).__name__})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        live_feed.disconnect(client)
 
 
 @router.post("/scheduler", response_model=SchedulerResponse)
 async def api_scheduler(req: SchedulerRequest):
     """Quantum Transaction Scheduler: minimize conflicts (graph coloring QUBO)."""
-    return await solve_scheduler(req)
+    return _fast_json(await run_solver(solve_scheduler, req))
 
 
 @router.post("/liquidation", response_model=LiquidationResponse)
 async def api_liquidation(req: LiquidationRequest):
     """Quantum Liquidation Optimizer: optimal set of positions to liquidate."""
-    return await solve_liquidation(req)
+    return _fast_json(await run_solver(solve_liquidation, req))
+
+
+@router.post("/positions", response_model=PositionBookResponse)
+async def api_positions_update(update: PositionBookUpdate):
+    """Incremental position-book update: upserts, removals, price / threshold changes."""
+    return _fast_json(await run_solver(solve_position_update, update, record=False))
+
+
+@router.post("/positions/liquidatable", response_model=LiquidatableResponse)
+async def api_positions_liquidatable(q: LiquidatableQuery):
+    """Top-K liquidatable positions of the stored book under gas / liquidity caps."""
+    return _fast_json(await run_solver(solve_liquidatable, q))
+
+
+@router.post("/stress-test", response_model=StressTestResponse)
+async def api_stress_test(req: StressTestRequest):
+    """Price-shock sweep: health factors and liquidation selection for every scenario in one call."""
+    try:
+        return _fast_json(await run_solver(solve_stress_test, req))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/mempool/schedule", response_model=SchedulerResponse)
+async def api_mempool_schedule():
+    """Latest schedule of the pending swaps ingested from the mempool (MEMPOOL_ENABLED)."""
+    result = mempool.latest_schedule()
+    if result is None:
+        detail = "mempool ingestion is disabled" if not settings.MEMPOOL_ENABLED else "no pending swaps ingested yet"
+        raise HTTPException(status_code=404, detail=detail)
+    return _fast_json(result)
+
+
+def _require_profile_access(
+    x_profile: Optional[str] = Header(None),
+    profile: Optional[str] = Query(None),
+) -> None:
+    """Profiles are read with the same flag that creates them (X-Profile or ?profile=, PROFILE_TOKEN)."""
+    if not settings.PROFILE_REQUESTS_ENABLED:
+        raise HTTPException(status_code=404, detail="profiling is disabled")
+    if not profile_access(x_profile or profile):
+        raise HTTPException(status_code=403, detail="X-Profile flag required")
+
+
+@router.get("/profiles/hot", dependencies=[Depends(_require_profile_access)])
+async def api_profiles_hot(top: int = Query(30, ge=1, le=500), reset: bool = False):
+    """Hot solver frames from the always-on sampler: self samples per line, inclusive per function."""
+    return hot_frames(top, reset)
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(_require_profile_access)])
+async def api_profile(
+    profile_id: str,
+    format: Literal["text", "pstats"] = "text",
+    sort: Literal["cumulative", "tottime", "calls"] = "cumulative",
+    top: int = Query(40, ge=1, le=1000),
+):
+    """cProfile output of a profiled request (id from its X-Profile-Id header): pstats summary or the raw file."""
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    if format == "pstats":
+        return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+    return PlainTextResponse(await asyncio.to_thread(profile_summary, path, top, sort))
+
+
+@router.post("/backtest", response_model=BacktestResponse)
+async def api_backtest(req: BacktestRequest):
+    """Replay a recorded dataset (BACKTEST_DATA_DIR) through arbitrage, cycles and liquidation; parallel by time shard."""
+    try:
+        return _fast_json(await run_solver(solve_backtest, req))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/arbitrage/stream")
+async def api_arbitrage_stream(req: ArbitrageRequest, format: StreamFormat = "ndjson"):
+    """Arbitrage Pathfinder, streamed: one `path` event per improving path, then `result`."""
+    return _stream_response(stream_solver(stream_arbitrage, req), format)
+
+
+@router.post("/scheduler/stream")
+async def api_scheduler_stream(req: SchedulerRequest, format: StreamFormat = "ndjson"):
+    """Transaction Scheduler, streamed: one `slot` event per order as it is colored, then `result`."""
+    return _stream_response(stream_solver(stream_scheduler, req), format)
+
+
+@router.post("/liquidation/stream")
+async def api_liquidation_stream(req: LiquidationRequest, format: StreamFormat = "ndjson"):
+    """Liquidation Optimizer, streamed: one `pick` event per position in priority order, then `result`."""
+    return _stream_response(stream_solver(stream_liquidation, req), format)
 
 
 # --- Quantum Vision: Yield Infra & Prediction Market ---
@@ -76,16 +286,34 @@ async def api_liquidation(req: LiquidationRequest):
 @router.post("/yield-scheduling", response_model=YieldSchedulingResponse)
 async def api_yield_scheduling(req: YieldSchedulingRequest):
     """Yield Infra: quantum scheduling batches reinvest txs → 20–40% gas savings."""
-    return await solve_yield_scheduling(req)
+    return await run_solver(solve_yield_scheduling, req)
 
 
 @router.post("/pool-risk", response_model=PoolRiskResponse)
 async def api_pool_risk(req: PoolRiskRequest):
     """Pool risk classifier: quantum evaluates 10+ factors for accurate risk scores."""
-    return await solve_pool_risk_classifier(req)
+    return await run_solver(solve_pool_risk_classifier, req)
+
+
+@router.post("/allocation", response_model=AllocationResponse)
+async def api_allocation(req: AllocationRequest):
+    """Yield Infra: split capital across pools (mean-variance with rebalancing, TVL-impact and gas costs)."""
+    try:
+        return _fast_json(await run_solver(solve_capital_allocation, req))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/prediction-market", response_model=PredictionMarketResponse)
 async def api_prediction_market(req: PredictionMarketRequest):
     """Prediction market AMM: quantum dynamic curve → 15–30% less slippage."""
-    return await solve_prediction_market_amm(req)
+    return await run_solver(solve_prediction_market_amm, req)
+
+
+@router.post("/prediction-market/quotes", response_model=PredictionQuoteBatchResponse)
+async def api_prediction_quotes(req: PredictionQuoteBatchRequest):
+    """Prediction market AMM, batch: columnar quotes for arrays of bet sizes, outcomes and markets."""
+    try:
+        return _fast_json(await run_solver(solve_prediction_quotes, req))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
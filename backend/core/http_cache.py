@@ -0,0 +1,101 @@
+"""
+Conditional, pre-compressed responses for polled read endpoints.
+
+A body is rendered once per (snapshot version, query) and kept with its gzip / brotli variants
+(brotli optional: used only if the `brotli` package is installed). A repeated poll is a dict
+lookup, and a poll whose If-None-Match carries the current ETag gets a bodyless 304.
+"""
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from fastapi import Request, Response
+
+from core.config import settings
+from core.responses import ORJSONResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class RenderedBody:
+    """JSON bytes plus lazily built compressed variants."""
+
+    __slots__ = ("raw", "_encoded")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._encoded: dict[str, bytes] = {}
+
+    def encode(self, accept_encoding: str) -> tuple[bytes, Optional[str]]:
+        """Best variant the client accepts (br > gzip > identity); small bodies are sent as is."""
+        if len(self.raw) < settings.HTTP_COMPRESS_MIN_BYTES:
+            return self.raw, None
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding not in accepted or (encoding == "br" and brotli is None):
+                continue
+            data = self._encoded.get(encoding)
+            if data is None:
+                data = brotli.compress(self.raw, quality=5) if encoding == "br" else gzip.compress(self.raw, compresslevel=6)
+                self._encoded[encoding] = data
+            return data, encoding
+        return self.raw, None
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if name:
+            accepted.add(name.strip())
+    return accepted
+
+
+class BodyCache:
+    """Small LRU of rendered bodies."""
+
+    def __init__(self, maxsize: int = 64):
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, RenderedBody]" = OrderedDict()
+
+    def get(self, key: Hashable, render: Callable[[], Any]) -> RenderedBody:
+        body = self._entries.get(key)
+        if body is None:
+            body = self._entries[key] = RenderedBody(ORJSONResponse(render()).body)
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return body
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag (the representation varies by Content-Encoding) over the version parts."""
+    return 'W/"' + hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest() + '"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def cached_response(request: Request, etag: str, max_age: int, body: Callable[[], RenderedBody], headers: Optional[dict] = None) -> Response:
+    """304 when the client's ETag is current, else the (compressed) body; `body` is only called for a 200."""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max(0, int(max_age))}", "Vary": "Accept-Encoding", **(headers or {})}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    content, encoding = body().encode(request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content, media_type="application/json", headers=headers)
@@ -1,13 +1,111 @@
+"""
+Non-blocking structured logging.
+
+Loggers hand records to a QueueHandler: the calling thread (event loop or solver worker) only
+resolves the message and trace id and does a non-blocking put; a record is dropped if the queue
+is full. A QueueListener thread formats them (one JSON object per line, or text) and writes them
+to stdout and LOG_FILE, so log I/O never runs on a request's path.
+"""
+
+import atexit
+import copy
+import json
 import logging
+import queue
 import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from core.config import settings
+from core.tracing import current_trace_id
+
+# LogRecord attributes; anything else on a record came from `extra=` and is logged as a JSON key
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "trace_id", "color_message"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional["_NonBlockingQueueHandler"] = None
+
+logger = logging.getLogger("qhda")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.trace_id:
+            entry["trace_id"] = record.trace_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only what depends on the calling thread; formatting happens on the listener thread
+        record = copy.copy(record)
+        record.trace_id = getattr(record, "trace_id", None) or current_trace_id() or ""
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging() -> None:
+    """Route the root logger (and uvicorn's) through the queue; idempotent."""
+    global _listener, _handler
+    if _listener is not None:
+        return
+    if settings.LOG_FORMAT.strip().lower() == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s")
+    outputs: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if settings.LOG_FILE:
+        outputs.append(logging.FileHandler(settings.LOG_FILE, delay=True))  # opened by the listener thread
+    for h in outputs:
+        h.setFormatter(formatter)
+
+    _handler = _NonBlockingQueueHandler(queue.Queue(maxsize=max(1, settings.LOG_QUEUE_SIZE)))
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+    _listener = QueueListener(_handler.queue, *outputs, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Drain the queue and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('qhda.log')
-    ]
-)
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+def logging_stats() -> dict:
+    if _handler is None:
+        return {"enabled": False}
+    return {"enabled": True, "queued": _handler.queue.qsize(), "dropped": _handler.dropped}
@@ -0,0 +1,233 @@
+"""
+Solver profiling: opt-in per-request cProfile and an always-on low-rate stack sampler.
+
+Per request (PROFILE_REQUESTS_ENABLED): a request sent with `X-Profile: 1` or `?profile=1` runs
+its solvers under cProfile. When PROFILE_TOKEN is set, the flag's value must equal the token.
+Each solve is written to PROFILE_DIR as a pstats file (the newest PROFILE_MAX_ARTIFACTS are
+kept), and the ids come back in the X-Profile-Id response header (/api/quantum/profiles/{id}).
+Reading profiles takes the same flag (profile_access).
+
+Always on while profiling is enabled (PROFILE_SAMPLER_ENABLED): a daemon thread looks at every thread's stack each
+PROFILE_SAMPLE_INTERVAL_SECONDS and counts the frames in the solver modules
+(PROFILE_SAMPLE_MODULES): self samples per line of the innermost solver frame, inclusive samples
+per function. Live traffic shows its hot spots without redeploying or slowing requests.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import parse_qs
+
+from core.config import settings
+from core.tracing import current_trace_id
+
+_PROFILE_ID = re.compile(r"^[A-Za-z0-9_.-]+$")
+_requested: ContextVar[Optional[list[str]]] = ContextVar("profile_ids", default=None)  # ids written so far
+
+
+# --- Per-request cProfile ---
+
+
+def _flag_enabled(value: Optional[str]) -> bool:
+    if value is None:
+        return False
+    if settings.PROFILE_TOKEN:
+        return value == settings.PROFILE_TOKEN
+    return value.lower() in ("1", "true", "yes")
+
+
+def profile_access(value: Optional[str]) -> bool:
+    """Whether a request flagged with `value` may create or read profiles."""
+    return settings.PROFILE_REQUESTS_ENABLED and _flag_enabled(value)
+
+
+class ProfileMiddleware:
+    """Pure ASGI: marks flagged requests for profiling and returns the artifact ids as a header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        flag = dict(scope["headers"]).get(b"x-profile")
+        value = flag.decode("latin-1") if flag else parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile", [None])[0]
+        if not _flag_enabled(value):
+            return await self.app(scope, receive, send)
+        ids: list[str] = []
+        token = _requested.set(ids)
+
+        async def send_with_ids(message):
+            if message["type"] == "http.response.start" and ids:
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", ",".join(ids).encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_ids)
+        finally:
+            _requested.reset(token)
+
+
+def _profile_dir() -> Path:
+    path = Path(settings.PROFILE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _prune(directory: Path) -> None:
+    artifacts = sorted(directory.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+    for old in artifacts[: max(0, len(artifacts) - settings.PROFILE_MAX_ARTIFACTS)]:
+        old.unlink(missing_ok=True)
+
+
+@contextmanager
+def profile_solver(name: str) -> Iterator[None]:
+    """Run the block under cProfile when the current request asked for it (solver worker thread)."""
+    ids = _requested.get()
+    if ids is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profile_id = f"{current_trace_id() or uuid.uuid4().hex[:16]}-{len(ids)}-{name}"
+        profile_id = re.sub(r"[^A-Za-z0-9_.-]", "_", profile_id)
+        directory = _profile_dir()
+        profiler.dump_stats(directory / f"{profile_id}.prof")
+        _prune(directory)
+        ids.append(profile_id)
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = Path(settings.PROFILE_DIR) / f"{profile_id}.prof"
+    return path if path.is_file() else None
+
+
+def profile_summary(path: Path, top: int = 40, sort: str = "cumulative") -> str:
+    out = io.StringIO()
+    pstats.Stats(str(path), stream=out).sort_stats(sort).print_stats(top)
+    return out.getvalue()
+
+
+# --- Always-on sampler ---
+
+
+class HotFrameSampler:
+    def __init__(self, interval: float, modules: tuple[str, ...]):
+        self.interval = interval
+        self.modules = modules  # filename suffixes, e.g. "quantum_simulator.py"
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._self: Counter = Counter()  # (file, function, line) -> samples as innermost solver frame
+        self._inclusive: Counter = Counter()  # (file, function) -> samples anywhere on the stack
+        self._ticks = 0
+        self._hits = 0
+        self._since = time.time()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="hot-frame-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        me = threading.get_ident()
+        leaves, functions = [], set()
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            leaf, seen = None, set()
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename.endswith(self.modules):
+                    module = os.path.basename(code.co_filename)
+                    if leaf is None:
+                        leaf = (module, code.co_name, frame.f_lineno)
+                    seen.add((module, code.co_name))
+                frame = frame.f_back
+            if leaf is not None:
+                leaves.append(leaf)
+                functions |= seen
+        with self._lock:
+            self._ticks += 1
+            self._hits += len(leaves)
+            self._self.update(leaves)
+            self._inclusive.update(functions)
+
+    def report(self, top: int = 30, reset: bool = False) -> dict:
+        with self._lock:
+            hits = self._hits
+
+            def rows(counter: Counter) -> list[dict]:
+                return [
+                    {"frame": ":".join(str(part) for part in key), "samples": n, "pct": round(100 * n / hits, 2) if hits else 0.0}
+                    for key, n in counter.most_common(top)
+                ]
+
+            result = {
+                "enabled": True,
+                "interval_seconds": self.interval,
+                "since": self._since,
+                "ticks": self._ticks,
+                "solver_samples": hits,
+                "self": rows(self._self),
+                "inclusive": rows(self._inclusive),
+            }
+            if reset:
+                self._self.clear()
+                self._inclusive.clear()
+                self._ticks = self._hits = 0
+                self._since = time.time()
+            return result
+
+
+_sampler: Optional[HotFrameSampler] = None
+
+
+def start_sampler() -> None:
+    global _sampler
+    if not (settings.PROFILE_REQUESTS_ENABLED and settings.PROFILE_SAMPLER_ENABLED) or _sampler is not None:
+        return
+    modules = tuple(m.strip() for m in settings.PROFILE_SAMPLE_MODULES.split(",") if m.strip())
+    _sampler = HotFrameSampler(max(0.001, settings.PROFILE_SAMPLE_INTERVAL_SECONDS), modules)
+    _sampler.start()
+
+
+def stop_sampler() -> None:
+    global _sampler
+    if _sampler is not None:
+        _sampler.stop()
+        _sampler = None
+
+
+def hot_frames(top: int = 30, reset: bool = False) -> dict:
+    if _sampler is None:
+        return {"enabled": False}
+    return _sampler.report(top, reset)
@@ -0,0 +1,78 @@
+"""
+Request trace ids and span timing.
+
+TraceMiddleware gives every HTTP / WebSocket request a trace id: the caller's X-Request-ID, else
+a random one. The id is echoed in the response header and held in a context variable, so log
+records from the request (and from solver threads, which run in a copy of the request context)
+carry it. With LOG_SPANS, timed spans (request, solver queue / solve) are logged as records.
+"""
+
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from core.config import settings
+
+_HEADER = b"x-request-id"
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+_log = logging.getLogger("qhda.trace")
+
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+def record_span(name: str, duration_ms: float, **fields) -> None:
+    """Log one finished span (LOG_SPANS); fields become JSON keys of the record."""
+    if settings.LOG_SPANS:
+        _log.info(name, extra={"span": name, "duration_ms": round(duration_ms, 3), **fields})
+
+
+@contextmanager
+def span(name: str, **fields) -> Iterator[None]:
+    """Time the block as a span (no-op unless LOG_SPANS)."""
+    if not settings.LOG_SPANS:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, (time.perf_counter() - t0) * 1000, **fields)
+
+
+class TraceMiddleware:
+    """Pure ASGI middleware (no per-request task or body buffering)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        incoming = dict(scope["headers"]).get(_HEADER)
+        trace_id = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex[:16]
+        token = _trace_id.set(trace_id)
+        t0 = time.perf_counter()
+        status = [None]
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message["headers"] = [*message.get("headers", []), (_HEADER, trace_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            record_span(
+                scope["type"],
+                (time.perf_counter() - t0) * 1000,
+                method=scope.get("method"),
+                path=scope.get("path"),
+                status=status[0],
+            )
+            _trace_id.reset(token)
@@ -10,8 +10,23 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from api import health, quantum, pharos
 from core.config import settings
+from core.logger import logger, setup_logging
+from core.profiling import ProfileMiddleware, start_sampler, stop_sampler
+from core.responses import ORJSONResponse
+from core.tracing import TraceMiddleware
+from services import backtest, mempool, persistence, redis_client, shared_pools, solver_pool
+from services.live_feed import publish_snapshot
+from services.pool_features import get_pool_features
+from services.readiness import probe_loop
+from services.warmup import warm_up_solvers
+
+setup_logging()
 
 _background_task: asyncio.Task | None = None
+_warmup_task: asyncio.Task | None = None
+_probe_task: asyncio.Task | None = None
+_persist_task: asyncio.Task | None = None
+_mempool_task: asyncio.Task | None = None
 
 
 async def _pool_refresh_loop():
@@ -21,27 +36,53 @@ async def _pool_refresh_loop():
     while True:
         try:
             await asyncio.sleep(settings.POOL_CACHE_TTL_SECONDS)
-            await fetcher.get_pools()
-            print(f"Pool cache refreshed at {datetime.utcnow().isoformat()}")
+            # Shared-memory role can change: an "auto" reader takes over if the publisher exited
+            role = shared_pools.ensure_role()
+            pools = await fetcher.get_pools()
+            snapshot = fetcher.snapshot_info()
+            block_number = snapshot["block_number"]
+            if role == "publisher":
+                shared_pools.publish(pools, block_number)
+            persistence.record_pool_snapshot(pools, block_number)
+            mempool.set_pools(pools)
+            get_pool_features().update(pools, snapshot["fetched_at"])
+            await publish_snapshot(pools, block_number)
+            logger.info("pool cache refreshed", extra={"pools": len(pools), "block_number": block_number})
         except asyncio.CancelledError:
-            print("Pool refresh task cancelled")
+            logger.info("pool refresh task cancelled")
             break
-        except Exception as e:
-            print(f"Error refreshing pool cache: {e}")
+        except Exception:
+            logger.exception("pool cache refresh failed")
             await asyncio.sleep(5)  # Wait before retry
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global _background_task
+    global _background_task, _warmup_task, _probe_task, _persist_task, _mempool_task
+    shared_pools.ensure_role()
+    start_sampler()
+    # Warm-up runs in the background: liveness answers immediately, /api/ready waits for it.
+    _warmup_task = asyncio.create_task(warm_up_solvers())
     _background_task = asyncio.create_task(_pool_refresh_loop())
+    _probe_task = asyncio.create_task(probe_loop())
+    if settings.PERSIST_ENABLED:
+        _persist_task = asyncio.create_task(persistence.flush_loop())
+    if settings.MEMPOOL_ENABLED:
+        _mempool_task = asyncio.create_task(mempool.ingest_loop())
     yield
-    if _background_task:
-        _background_task.cancel()
-        try:
-            await _background_task
-        except asyncio.CancelledError:
-            pass
+    for task in (_warmup_task, _background_task, _probe_task, _persist_task, _mempool_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    stop_sampler()
+    solver_pool.shutdown()
+    backtest.shutdown()
+    shared_pools.close()
+    await mempool.close()
+    await redis_client.close()
 
 
 app = FastAPI(
@@ -49,6 +90,7 @@ app = FastAPI(
     description="Classical Core API for Quantum-Hybrid DEX Accelerator prototype",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -59,7 +101,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "X-Profile-Id", "X-Total-Count"],
 )
+if settings.PROFILE_REQUESTS_ENABLED:
+    app.add_middleware(ProfileMiddleware)
+# Outermost: every request (including CORS preflights) gets a trace id
+app.add_middleware(TraceMiddleware)
 
 app.include_router(health.router, prefix="/api", tags=["Health"])
 app.include_router(quantum.router, prefix="/api/quantum", tags=["Quantum"])
@@ -2,8 +2,8 @@
 Pydantic models for quantum module requests/responses.
 """
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional
 
 
 class PoolInput(BaseModel):
@@ -20,6 +20,35 @@ class ArbitrageRequest(BaseModel):
     max_hops: int = 4
     amount_in: float = 1000.0
     use_extended_demo: bool = False  # Use 6-token graph where quantum (full path) beats greedy (2-hop)
+    time_budget_ms: Optional[int] = None  # solver deadline; best-so-far result is returned when it expires
+    split_paths: int = 1  # >1: split amount_in across up to this many top paths (see split_routes)
+
+
+class ArbitrageColumnarRequest(BaseModel):
+    """Arbitrage fast path: pools as parallel arrays; token_pairs index into `tokens`."""
+
+    token_in: str
+    token_out: str
+    tokens: list[str]
+    addresses: list[str]
+    token_pairs: list[tuple[int, int]]
+    reserves: list[tuple[float, float]]
+    fees: list[int]  # basis points
+    max_hops: int = 4
+    amount_in: float = 1000.0
+    time_budget_ms: Optional[int] = None  # ms
+    split_paths: int = 1
+
+    @model_validator(mode="after")
+    def _check_columns(self):
+        n = len(self.addresses)
+        if not (len(self.token_pairs) == len(self.reserves) == len(self.fees) == n):
+            raise ValueError("addresses, token_pairs, reserves and fees must have the same length")
+        n_tokens = len(self.tokens)
+        for i0, i1 in self.token_pairs:
+            if not (0 <= i0 < n_tokens and 0 <= i1 < n_tokens):
+                raise ValueError("token_pairs index out of range of tokens")
+        return self
 
 
 class TransactionRef(BaseModel):
@@ -28,6 +57,14 @@ class TransactionRef(BaseModel):
     amount: float
 
 
+class SplitRoute(BaseModel):
+    path: list[str]
+    amount_in: float
+    amount_out: float
+    share_pct: float
+    transactions: list[TransactionRef]  # per hop and pool, with the actual input amount at that hop
+
+
 class ArbitrageComparison(BaseModel):
     classical_path: list[str]
     classical_profit: float
@@ -46,9 +83,36 @@ class ArbitrageResponse(BaseModel):
     simulation_time: float  # ms
     classical_baseline: Optional[float] = None
     comparison: Optional[ArbitrageComparison] = None
+    budget_exhausted: bool = False  # True if time_budget_ms ran out before the search completed
+    proven_optimal: Optional[bool] = None  # True only if the result is provably optimal for the model
+    split_routes: Optional[list[SplitRoute]] = None  # set when split_paths > 1
+    split_amount_out: Optional[float] = None  # total output of split_routes
     quantum_metrics: Optional[dict] = None  # paths_evaluated, max_hops, solver_ms, qubo_approx_vars
 
 
+class FeedSubscription(BaseModel):
+    """Live feed query: best path token_in -> token_out ("pair") or best cycle from token_in ("cycle")."""
+
+    kind: Literal["pair", "cycle"] = "pair"
+    token_in: str
+    token_out: Optional[str] = None  # required for "pair"
+    amount_in: float = 1000.0
+    max_hops: int = 4
+
+    @model_validator(mode="after")
+    def _check_pair(self):
+        if self.kind == "pair" and not self.token_out:
+            raise ValueError("token_out is required for pair subscriptions")
+        if self.kind == "cycle":
+            self.token_out = None
+        return self
+
+    @property
+    def key(self) -> str:
+        """Stable id shared by every client subscribed to the same query."""
+        return f"{self.kind}:{self.token_in}:{self.token_out or ''}:{self.amount_in:g}:{self.max_hops}"
+
+
 # --- Scheduler ---
 
 
@@ -59,11 +123,16 @@ class PendingOrder(BaseModel):
     account: str
     reads: list[str] = []
     writes: list[str] = []
+    gas_estimate: Optional[int] = Field(None, gt=0)  # for max_gas_per_slot packing (default 150k)
 
 
 class SchedulerRequest(BaseModel):
     pending_orders: list[PendingOrder]
     conflict_matrix: Optional[list[list[int]]] = None  # computed if not provided
+    annealing: bool = False  # shrink the greedy slot count with simulated annealing (k-coloring BQM)
+    annealing_restarts: Optional[int] = None  # independent seeded restarts per k (default SCHEDULER_ANNEAL_RESTARTS)
+    max_gas_per_slot: Optional[int] = Field(None, gt=0)  # also bin-pack slots to this gas capacity (e.g. the block gas limit)
+    time_budget_ms: Optional[int] = None  # ms
 
 
 class SchedulerComparison(BaseModel):
@@ -82,6 +151,10 @@ class SchedulerResponse(BaseModel):
     conflict_matrix: Optional[list[list[int]]] = None  # for heatmap
     total_conflicts: int = 0
     comparison: Optional[SchedulerComparison] = None
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
+    slot_gas: Optional[dict[str, int]] = None  # slot_id -> total gas_estimate of its orders
+    slot_utilization: Optional[dict[str, float]] = None  # slot_id -> gas / max_gas_per_slot
     quantum_metrics: Optional[dict] = None  # graph_nodes, graph_edges, coloring_ms, conflict_pairs
 
 
@@ -102,6 +175,7 @@ class LiquidationRequest(BaseModel):
     positions_to_liquidate: list[PositionToLiquidate]
     available_liquidity: Optional[dict[str, float]] = None  # e.g. {"USDC": 100000, "USDT": 50000}
     protocol_constraints: Optional[dict] = None  # max_gas_per_block, etc.
+    time_budget_ms: Optional[int] = None  # ms
 
 
 class LiquidationComparison(BaseModel):
@@ -122,9 +196,140 @@ class LiquidationResponse(BaseModel):
     estimated_recovery: float
     simulation_time: float
     comparison: Optional[LiquidationComparison] = None
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
     quantum_metrics: Optional[dict] = None  # positions_evaluated, constraints_checked, solver_ms
 
 
+# --- Server-side position book ---
+
+
+class StorePosition(BaseModel):
+    position_id: str
+    collateral: dict[str, float] = {}  # token -> amount
+    debt: dict[str, float] = {}  # token -> amount (also checked against available_liquidity)
+    health_factor: Optional[float] = None  # fixed health; otherwise computed from amounts and the book's prices
+    liquidation_bonus: float = 0.1
+    gas_estimate: Optional[int] = None
+
+
+class PositionBookUpdate(BaseModel):
+    """Incremental update: upserted / removed positions and changed prices (only affected positions are re-scored)."""
+
+    positions: list[StorePosition] = []
+    remove: list[str] = []
+    prices: Optional[dict[str, float]] = None  # token -> price; merged into the book's prices
+    liquidation_thresholds: Optional[dict[str, float]] = None  # token -> collateral factor (default LIQUIDATION_THRESHOLD_DEFAULT)
+
+
+class PositionBookResponse(BaseModel):
+    book_size: int
+    liquidatable: int  # positions with health factor < 1
+    upserted: int
+    removed: int
+    rescored: int  # positions whose health factor was recomputed
+    unpriced: int  # positions with a token that has no price yet (never liquidatable)
+    simulation_time: float
+
+
+class LiquidatableQuery(BaseModel):
+    k: int = Field(50, ge=1)  # at most this many positions
+    max_health: float = 1.0  # frontier: health_factor < max_health
+    order: Literal["health", "recovery"] = "health"  # worst health first, or best recovery first
+    max_gas_per_block: Optional[int] = None
+    available_liquidity: Optional[dict[str, float]] = None
+    time_budget_ms: Optional[int] = None  # ms
+
+
+class LiquidatableResponse(BaseModel):
+    selected_positions: list[str]
+    strategy: list[dict]  # position, health_factor, action, priority
+    estimated_recovery: float
+    gas_used: int
+    constraint_violation: Optional[str] = None
+    frontier_size: int
+    book_size: int
+    simulation_time: float
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
+
+
+# --- Price-shock stress test ---
+
+
+class StressPosition(BaseModel):
+    position_id: str
+    collateral: dict[str, float]  # token -> amount, e.g. {"ETH": 10}
+    debt: dict[str, float]  # token -> amount, e.g. {"USDC": 15000}
+    liquidation_bonus: float = 0.1
+    gas_estimate: Optional[int] = None
+
+
+class StressTestRequest(BaseModel):
+    positions: list[StressPosition]
+    prices: dict[str, float]  # token -> current price
+    liquidation_thresholds: Optional[dict[str, float]] = None  # token -> collateral factor (default LIQUIDATION_THRESHOLD_DEFAULT)
+    shocks: list[dict[str, float]] = []  # explicit scenarios: token -> relative price change (-0.3 = 30% drop)
+    random_scenarios: int = 0  # plus this many random scenarios, uniform in [-max_drop, max_rise] per token
+    max_drop: float = 0.5
+    max_rise: float = 0.0
+    correlated: bool = False  # random scenarios move all shocked tokens by the same draw (market-wide drop)
+    shocked_tokens: Optional[list[str]] = None  # tokens moved by random scenarios (default: all priced tokens)
+    seed: Optional[int] = None
+    available_liquidity: Optional[dict[str, float]] = None
+    max_gas_per_block: Optional[int] = None
+    detail_scenarios: int = 5  # selected position ids are returned for this many worst scenarios
+    time_budget_ms: Optional[int] = None  # ms
+
+
+class StressTestResponse(BaseModel):
+    scenarios: int  # evaluated (explicit shocks first, then random)
+    positions: int
+    # Columnar: one entry per evaluated scenario
+    liquidatable: list[int]  # positions with health factor < 1
+    selected: list[int]  # positions picked under the gas / liquidity constraints
+    debt_at_risk: list[float]  # debt value of liquidatable positions
+    debt_liquidated: list[float]
+    bonus_value: list[float]
+    bad_debt: list[float]  # debt value not covered by collateral value
+    gas_used: list[int]
+    summary: dict  # baseline (unshocked), percentiles, worst scenario
+    worst_scenarios: list[dict]  # scenario, shock, liquidatable and selected position ids
+    simulation_time: float
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
+    quantum_metrics: Optional[dict] = None
+
+
+# --- Backtest ---
+
+
+class BacktestRequest(BaseModel):
+    dataset: str  # directory name under BACKTEST_DATA_DIR (chunk_* subdirectories)
+    pairs: list[tuple[str, str]] = []  # (token_in, token_out) arbitrage queries per snapshot
+    cycle_tokens: list[str] = []  # best cycle from each token per snapshot
+    amount_in: float = 1000.0
+    max_hops: int = 4
+    liquidation: bool = True  # replay the position book through liquidation selection
+    max_gas_per_block: Optional[int] = None
+    available_liquidity: Optional[dict[str, float]] = None
+    workers: Optional[int] = Field(None, ge=1)  # shards replayed at once (1 = inline); default and cap BACKTEST_WORKERS
+    time_budget_ms: Optional[int] = None  # ms, per shard; default BACKTEST_TIME_BUDGET_MS (not the solver cap)
+
+
+class BacktestResponse(BaseModel):
+    dataset: str
+    shards: int
+    snapshots_replayed: int
+    arbitrage: dict  # "pair:<in>-><out>" / "cycle:<token>" -> total_profit, opportunities, snapshots
+    # (pairs with no direct pool in some snapshots also report no_direct_snapshots / no_direct_output)
+    liquidation: dict  # positions_liquidated, debt_covered, bonus_value
+    latency_ms: dict  # stage -> {mean, p50, p95, max} per snapshot
+    simulation_time: float
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
+
+
 # --- Quantum Vision: Yield Infra & Prediction Market ---
 
 
@@ -138,6 +343,7 @@ class YieldSchedulingRequest(BaseModel):
     transactions: list[YieldTxRef]
     gas_limit: Optional[int] = 500_000
     gas_per_tx: Optional[int] = 80_000
+    time_budget_ms: Optional[int] = None  # ms
 
 
 class YieldSchedulingComparison(BaseModel):
@@ -155,19 +361,23 @@ class YieldSchedulingResponse(BaseModel):
     txs_batched: int
     simulation_time: float
     comparison: Optional[YieldSchedulingComparison] = None
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
     quantum_metrics: Optional[dict] = None
 
 
 class PoolRiskInput(BaseModel):
-    pool_id: str
-    volatility: Optional[float] = 0.5
+    pool_id: str  # pool address to use the streamed features
+    volatility: Optional[float] = None  # annualized; default: streamed from pool snapshots, else 0.5
     tvl_usd: Optional[float] = 1_000_000
-    concentration: Optional[float] = None
-    audit_score: Optional[float] = None
+    concentration: Optional[float] = Field(None, ge=0, le=1)  # share of its tokens' reserves; default: streamed
+    turnover: Optional[float] = Field(None, ge=0)  # EWMA of per-snapshot |Δ reserve0| / reserve0; default: streamed
+    audit_score: Optional[float] = Field(None, ge=0, le=1)  # 0-1 (1 = fully audited); default 1
 
 
 class PoolRiskRequest(BaseModel):
-    pools: list[PoolRiskInput]
+    pools: list[PoolRiskInput] = []  # empty: every pool seen in the pool snapshots
+    time_budget_ms: Optional[int] = None  # ms
 
 
 class PoolRiskComparison(BaseModel):
@@ -183,12 +393,60 @@ class PoolRiskScore(BaseModel):
     classical_score: float
     quantum_score: float
     risk_band: str  # low, medium, high
+    features: Optional[dict] = None  # streamed volatility / turnover / concentration and sample count
 
 
 class PoolRiskResponse(BaseModel):
     pool_scores: list[PoolRiskScore]
     simulation_time: float
     comparison: Optional[PoolRiskComparison] = None
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
+    quantum_metrics: Optional[dict] = None
+
+
+class AllocationPool(PoolRiskInput):
+    apy: float  # annual yield as a fraction (0.08 = 8%)
+    risk_score: Optional[float] = Field(None, ge=0, le=100)  # e.g. from /pool-risk; default: scored from the risk factors
+    current_usd: float = 0.0  # capital currently in the pool
+    gas_cost_usd: float = 0.0  # cost of one deposit / withdrawal tx
+    max_allocation_usd: Optional[float] = None
+
+
+class AllocationRequest(BaseModel):
+    pools: list[AllocationPool]
+    capital_usd: Optional[float] = None  # default: sum of current_usd
+    horizon_days: float = 30.0  # yield and variance accrue over the horizon; trading costs are paid once
+    risk_aversion: float = 2.0  # weight of portfolio variance
+    risk_penalty: float = 0.05  # APY haircut of a pool with risk_score 100
+    correlation: float = 0.3  # pairwise return correlation between pools
+    rebalance_cost_bps: float = 10.0  # proportional cost of moving capital in or out of a pool
+    max_share: float = 0.25  # per-pool cap as a share of capital
+    max_tvl_share: float = 0.1  # per-pool cap as a share of the pool's TVL
+    time_budget_ms: Optional[int] = None  # ms
+
+
+class PoolAllocation(BaseModel):
+    pool_id: str
+    weight: float  # share of capital
+    amount_usd: float
+    trade_usd: float  # amount_usd - current_usd
+    net_apy: float  # APY after the risk haircut
+    risk_score: float
+
+
+class AllocationResponse(BaseModel):
+    allocations: list[PoolAllocation]  # pools with capital or a trade, largest first
+    idle_usd: float  # capital left unallocated
+    expected_apy: float  # net APY of the whole capital
+    volatility: float  # annualized portfolio volatility
+    expected_yield_usd: float  # over horizon_days, after trading costs and gas
+    trading_cost_usd: float  # proportional cost plus TVL-depth price impact
+    gas_cost_usd: float
+    trades: int
+    simulation_time: float
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
     quantum_metrics: Optional[dict] = None
 
 
@@ -196,6 +454,7 @@ class PredictionMarketRequest(BaseModel):
     outcomes: Optional[list[str]] = None  # e.g. ["Yes", "No"]
     liquidity: Optional[float] = 10_000
     bet_amount: Optional[float] = 500
+    time_budget_ms: Optional[int] = None  # ms
 
 
 class PredictionMarketComparison(BaseModel):
@@ -211,4 +470,44 @@ class PredictionMarketResponse(BaseModel):
     slippage_pct: float
     simulation_time: float
     comparison: Optional[PredictionMarketComparison] = None
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
+    quantum_metrics: Optional[dict] = None
+
+
+class PredictionMarketSpec(BaseModel):
+    outcomes: Optional[list[str]] = None  # default ["Yes", "No"]
+    liquidity: Optional[float] = 10_000
+
+
+class PredictionQuoteBatchRequest(BaseModel):
+    """Many quotes in one call, as parallel arrays (one entry per quote)."""
+
+    markets: list[PredictionMarketSpec] = []  # default: one binary market
+    bet_amounts: list[float]
+    outcome_indices: Optional[list[int]] = None  # index into the market's outcomes (default 0)
+    market_indices: Optional[list[int]] = None  # index into markets (default 0)
+    liquidity: Optional[list[float]] = None  # per-quote override of the market's liquidity
+    time_budget_ms: Optional[int] = None  # ms
+
+    @model_validator(mode="after")
+    def _check_columns(self):
+        n = len(self.bet_amounts)
+        for name in ("outcome_indices", "market_indices", "liquidity"):
+            column = getattr(self, name)
+            if column is not None and len(column) != n:
+                raise ValueError(f"{name} must have the same length as bet_amounts")
+        return self
+
+
+class PredictionQuoteBatchResponse(BaseModel):
+    quotes: int
+    # Columnar: one entry per quote, in request order
+    execution_price: list[float]
+    slippage_pct: list[float]
+    classical_execution_price: list[float]
+    classical_slippage_pct: list[float]
+    simulation_time: float
+    budget_exhausted: bool = False
+    proven_optimal: Optional[bool] = None
     quantum_metrics: Optional[dict] = None
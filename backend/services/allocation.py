@@ -0,0 +1,211 @@
+"""
+Multi-protocol capital allocation (Yield Infra).
+
+Capital shares w over the candidate pools maximize the horizon's risk-adjusted yield net of
+rebalancing costs:
+    min  -mu.w + (risk_aversion/2) * h * w'Sigma w + sum k_i (w_i - w0_i)^2 + c * |w - w0|_1
+    s.t. 0 <= w_i <= cap_i,  sum(w) <= 1 (the rest stays idle)
+mu is APY minus a haircut proportional to the pool-risk score (volatility and concentration
+default to the streamed pool features), Sigma has the pools' volatilities
+and one pairwise correlation (diagonal plus rank one), k_i = capital / TVL_i prices the trade
+against the pool's depth, and c is the proportional rebalancing cost. Fixing the rank-one term
+leaves a separable problem whose budget multiplier comes from sorted breakpoints, so the exact
+optimum is a 1-D root search of O(n log n) vector steps, with no iterative descent. Gas is a fixed cost
+per touched pool, which is not convex: trades whose gain does not cover their gas are frozen at
+the current allocation and the rest is re-solved.
+"""
+
+import time
+
+import numpy as np
+
+from core.config import settings
+from models.quantum import AllocationRequest, AllocationResponse, PoolAllocation
+from services.budget import Deadline
+from services.pool_features import get_pool_features
+
+_TOL = 1e-12  # relative root-finding tolerance
+_MAX_STEPS = 200
+_GAS_ROUNDS = 5
+_DUST_USD = 0.005
+
+
+def _risk_scores(req: AllocationRequest, vol: np.ndarray, tvl: np.ndarray, streamed: np.ndarray) -> np.ndarray:
+    """Given risk_score, else the classifier's classical score plus the concentration / audit factors.
+
+    concentration and audit_score are 0-1 (bounded by PoolRiskInput), so each factor adds 0-15
+    points and an audit can never pull a risky pool's score down.
+    """
+    score = np.minimum(100.0, vol * 40 + np.maximum(0.0, 20 - tvl / 500_000))
+    concentration = np.array([np.nan if p.concentration is None else p.concentration for p in req.pools])
+    concentration = np.nan_to_num(np.where(np.isnan(concentration), streamed, concentration), nan=0.0)
+    audit = np.array([1.0 if p.audit_score is None else p.audit_score for p in req.pools])
+    score += 15 * concentration + 15 * (1 - audit)
+    given = np.array([np.nan if p.risk_score is None else p.risk_score for p in req.pools])
+    return np.clip(np.where(np.isnan(given), score, given), 0.0, 100.0)
+
+
+def _separable(p: np.ndarray, a: np.ndarray, w0: np.ndarray, c: float, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """argmin sum(a/2 w^2 - p w + c |w - w0|) over lower <= w <= upper, sum(w) <= 1 (a > 0)."""
+
+    def at(nu: float) -> np.ndarray:
+        x = p - nu
+        return np.clip(np.where(x > a * w0 + c, (x - c) / a, np.where(x < a * w0 - c, (x + c) / a, w0)), lower, upper)
+
+    w = at(0.0)
+    if w.sum() <= 1.0:
+        return w
+    # sum(w(nu)) falls with slope 1/a_i while pool i is neither in its no-trade band nor at a bound:
+    # collect those nu-intervals, integrate the slope between sorted breakpoints, interpolate sum = 1
+    starts = np.concatenate([p - a * upper - c, p - a * np.minimum(w0, upper) + c])
+    ends = np.concatenate([p - a * np.maximum(w0, lower) - c, p - a * lower + c])
+    keep = ends > starts
+    weight = np.concatenate([1 / a, 1 / a])[keep]
+    points = np.concatenate([starts[keep], ends[keep]])
+    order = np.argsort(points, kind="stable")
+    points, slopes = points[order], np.cumsum(np.concatenate([weight, -weight])[order])
+    total = upper.sum() - np.concatenate([[0.0], np.cumsum(slopes[:-1] * np.diff(points))])
+    k = max(int(np.searchsorted(-total, -1.0)), 1)
+    nu = points[k - 1] + (total[k - 1] - 1.0) / slopes[k - 1] if slopes[k - 1] > 0 else points[k - 1]
+    return at(max(nu, 0.0))
+
+
+async def solve_capital_allocation(req: AllocationRequest) -> AllocationResponse:
+    """Split capital across pools by mean-variance with rebalancing, TVL-impact and gas costs."""
+    t0 = time.perf_counter()
+    deadline = Deadline.from_request(req.time_budget_ms)
+    pools = req.pools
+    n = len(pools)
+    if n > settings.ALLOCATION_MAX_POOLS:
+        raise ValueError(f"{n} pools exceed ALLOCATION_MAX_POOLS={settings.ALLOCATION_MAX_POOLS}")
+    if not 0.0 <= req.correlation <= 1.0:
+        raise ValueError("correlation must be in [0, 1]")
+    current = np.array([p.current_usd for p in pools], dtype=np.float64)
+    capital = req.capital_usd if req.capital_usd is not None else float(current.sum())
+    if capital <= 0:
+        raise ValueError("capital_usd must be positive (or given by current_usd)")
+    if current.sum() > capital * (1 + 1e-9):
+        raise ValueError(f"current allocations ({current.sum():.2f}) exceed capital_usd ({capital:.2f})")
+
+    apy = np.array([p.apy for p in pools], dtype=np.float64)
+    streamed = get_pool_features().lookup([p.pool_id for p in pools])
+    given = np.array([np.nan if p.volatility is None else p.volatility for p in pools], dtype=np.float64)
+    vol = np.where(np.isnan(given), np.nan_to_num(streamed["volatility"], nan=0.5), given)
+    tvl = np.maximum(np.array([1_000_000 if p.tvl_usd is None else p.tvl_usd for p in pools], dtype=np.float64), 1.0)
+    gas = np.array([p.gas_cost_usd for p in pools], dtype=np.float64) / capital
+    cap = np.array([np.inf if p.max_allocation_usd is None else p.max_allocation_usd for p in pools], dtype=np.float64)
+    risk = _risk_scores(req, vol, tvl, streamed["concentration"])
+
+    h = req.horizon_days / 365
+    net_apy = apy - req.risk_penalty * risk / 100
+    mu = net_apy * h
+    rho, lam = req.correlation, req.risk_aversion * h
+    var_diag = vol * vol
+    impact = capital / tvl
+    c = req.rebalance_cost_bps / 10_000
+    w0 = current / capital
+    upper = np.minimum(np.minimum(req.max_share, req.max_tvl_share * tvl / capital), cap / capital)
+    caps = upper = np.maximum(upper, 0.0)
+    # Coordinates interact only through budget and z = sigma.w (the correlation term): for a fixed z
+    # the problem is separable, and sigma.w(z) falls as z grows, so the optimum is the root of
+    # z - sigma.w(z), found by regula falsi with an exact separable solve per step.
+    curvature = lam * (1 - rho) * var_diag + 2 * impact
+    linear = mu + 2 * impact * w0
+
+    def grad(w: np.ndarray) -> np.ndarray:
+        return -mu + lam * ((1 - rho) * var_diag * w + rho * vol * (vol @ w)) + 2 * impact * (w - w0)
+
+    def solve(lower: np.ndarray, upper: np.ndarray) -> tuple[np.ndarray, int, bool]:
+        def at(z: float) -> np.ndarray:
+            return _separable(linear - lam * rho * vol * z, curvature, w0, c, lower, upper)
+
+        if lam * rho == 0:
+            return at(0.0), 1, True
+        # Illinois regula falsi on f(z) = z - sigma.w(z): increasing and piecewise linear in z
+        lo, hi = float(vol @ lower), float(vol @ upper)
+        f_lo, f_hi = lo - vol @ at(lo), hi - vol @ at(hi)
+        side = 0
+        for it in range(1, _MAX_STEPS + 1):
+            if f_lo >= 0 or f_hi <= 0 or hi - lo <= _TOL * (1.0 + hi):
+                break
+            if it % 8 == 0 and deadline.expired():
+                return at(hi if -f_lo > f_hi else lo), it, False
+            z = min(max(lo - f_lo * (hi - lo) / (f_hi - f_lo), lo), hi)
+            w = at(z)
+            f = z - vol @ w
+            if abs(f) <= _TOL * (1.0 + z):
+                return w, it, True
+            if f < 0:
+                lo, f_lo = z, f
+                f_hi = f_hi / 2 if side == -1 else f_hi
+                side = -1
+            else:
+                hi, f_hi = z, f
+                f_lo = f_lo / 2 if side == 1 else f_lo
+                side = 1
+        else:
+            return at(hi), _MAX_STEPS, False
+        return at(lo if f_lo >= 0 else hi), it, True
+
+    lower = np.zeros(n)
+    w, iterations, converged = solve(lower, upper)
+    frozen = np.zeros(n, dtype=bool)
+    for _ in range(_GAS_ROUNDS if gas.any() else 0):
+        if deadline.hit:
+            break
+        # Objective lost by reverting each trade alone vs. the gas it costs
+        d = w0 - w
+        # Only trades with a gas cost, and only where the current allocation is within the caps
+        traded = (np.abs(d) * capital > _DUST_USD) & (gas > 0) & (w0 <= caps) & ~frozen
+        loss = grad(w) * d + 0.5 * (lam * var_diag + 2 * impact) * d * d - c * np.abs(d)
+        freeze = traded & (loss < gas)
+        if not freeze.any():
+            break
+        frozen |= freeze
+        lower = np.where(frozen, w0, 0.0)
+        upper = np.where(frozen, w0, upper)
+        w, more, converged = solve(lower, upper)
+        iterations += more
+
+    trade = (w - w0) * capital
+    traded = np.abs(trade) > _DUST_USD
+    trading_cost = capital * (c * np.abs(w - w0).sum() + impact @ ((w - w0) ** 2))
+    gas_cost = capital * gas[traded].sum()
+    variance = (1 - rho) * (var_diag @ (w * w)) + rho * (vol @ w) ** 2
+    amount = w * capital
+    keep = np.flatnonzero((amount > _DUST_USD) | traded)
+    keep = keep[np.argsort(-amount[keep], kind="stable")]
+    allocations = [
+        PoolAllocation(
+            pool_id=pools[i].pool_id,
+            weight=round(float(w[i]), 6),
+            amount_usd=round(float(amount[i]), 2),
+            trade_usd=round(float(trade[i]), 2),
+            net_apy=round(float(net_apy[i]), 6),
+            risk_score=round(float(risk[i]), 2),
+        )
+        for i in keep.tolist()
+    ]
+    elapsed = (time.perf_counter() - t0) * 1000
+    return AllocationResponse(
+        allocations=allocations,
+        idle_usd=round(max(capital - float(amount.sum()), 0.0), 2),
+        expected_apy=round(float(net_apy @ w), 6),
+        volatility=round(float(np.sqrt(max(variance, 0.0))), 6),
+        expected_yield_usd=round(float(capital * (mu @ w) - trading_cost - gas_cost), 2),
+        trading_cost_usd=round(float(trading_cost), 2),
+        gas_cost_usd=round(float(gas_cost), 2),
+        trades=int(traded.sum()),
+        simulation_time=round(elapsed, 2),
+        budget_exhausted=deadline.hit,
+        # Exact for the convex model; the gas pass is a heuristic for the fixed costs
+        proven_optimal=converged and not gas.any(),
+        quantum_metrics={
+            "pools": n,
+            "iterations": iterations,
+            "converged": converged,
+            "frozen_for_gas": int(frozen.sum()),
+            "solver_ms": round(elapsed, 2),
+            "time_budget_ms": deadline.budget_ms,
+        },
+    )
@@ -0,0 +1,39 @@
+"""
+Solver time budgets: a cooperative deadline that solvers poll inside their search loops,
+returning the best result found so far once it expires (anytime behaviour).
+"""
+
+import time
+from typing import Optional
+
+from core.config import settings
+
+
+class Deadline:
+    """Monotonic deadline; budget_ms=None means unbounded."""
+
+    __slots__ = ("budget_ms", "_end", "hit")
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.budget_ms = budget_ms
+        self._end = time.perf_counter() + budget_ms / 1000 if budget_ms else None
+        self.hit = False  # set once expired() has returned True
+
+    @classmethod
+    def from_request(cls, budget_ms: Optional[int]) -> "Deadline":
+        """Request budget (or SOLVER_TIME_BUDGET_MS default), clamped to SOLVER_MAX_TIME_BUDGET_MS."""
+        budget = budget_ms if budget_ms and budget_ms > 0 else settings.SOLVER_TIME_BUDGET_MS
+        if settings.SOLVER_MAX_TIME_BUDGET_MS > 0:
+            budget = min(budget, settings.SOLVER_MAX_TIME_BUDGET_MS) if budget > 0 else settings.SOLVER_MAX_TIME_BUDGET_MS
+        return cls(budget if budget > 0 else None)
+
+    def expired(self) -> bool:
+        if self._end is not None and time.perf_counter() >= self._end:
+            self.hit = True
+        return self.hit
+
+    def remainder(self) -> "Deadline":
+        """A separate deadline ending at the same time; its expiry does not mark this one as hit."""
+        rest = Deadline(self.budget_ms)
+        rest._end = self._end
+        return rest
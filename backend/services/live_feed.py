@@ -0,0 +1,134 @@
+"""
+Live arbitrage feed: clients subscribe to token pairs or cycles over a WebSocket.
+
+On each new pool snapshot every distinct subscribed query is computed once (one graph build,
+on the solver pool), and only results that changed since the previous snapshot are fanned out
+to the subscribed clients. Registry state is only touched from the event loop.
+"""
+
+import asyncio
+from typing import Optional
+
+from core.config import settings
+from models.quantum import FeedSubscription
+from services.pharos_fetcher import get_pharos_fetcher
+from services.solver_pool import run_solver
+
+_queries: dict[str, FeedSubscription] = {}
+_subscribers: dict[str, set["FeedClient"]] = {}
+_last: dict[str, dict] = {}  # latest result per query key
+_snapshot = {"version": 0, "block_number": None}
+
+
+class FeedClient:
+    """One WebSocket connection: its subscriptions and a bounded outbound queue."""
+
+    __slots__ = ("queue", "keys")
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.FEED_CLIENT_BUFFER))
+        self.keys: set[str] = set()
+
+    def offer(self, message: dict) -> None:
+        """Enqueue without blocking the fan-out; a slow client loses its oldest pending message."""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+def feed_stats() -> dict:
+    return {
+        "queries": len(_queries),
+        "clients": len({c for clients in _subscribers.values() for c in clients}),
+        "snapshot_version": _snapshot["version"],
+    }
+
+
+async def _evaluate(pools: list, queries: dict[str, FeedSubscription]) -> dict[str, dict]:
+    """Compute every query on one pool graph (runs on the solver pool)."""
+    from services.budget import Deadline
+    from services.quantum_simulator import (
+        _arbitrage_qubo_classical,
+        _best_cycle,
+        _build_pool_graph,
+        _path_transactions,
+    )
+    from services.pool_table import PoolTable
+
+    table = PoolTable.from_pools(pools)
+    G = _build_pool_graph(table)
+    results = {}
+    for key, q in queries.items():
+        deadline = Deadline.from_request(None)
+        token_in = table.node(q.token_in)
+        if q.kind == "cycle":
+            path, amount_out = _best_cycle(G, token_in, q.amount_in, min(5, q.max_hops), deadline)
+        else:
+            path, _, amount_out, _, _ = _arbitrage_qubo_classical(
+                G, token_in, table.node(q.token_out), q.amount_in, min(5, q.max_hops), deadline
+            )
+        results[key] = {
+            "path": table.names(path, q.token_in, q.token_out or q.token_in),
+            "amount_in": q.amount_in,
+            "amount_out": round(amount_out, 6),
+            "profit": round(amount_out - q.amount_in, 6) if q.kind == "cycle" else None,
+            "transactions": [t.model_dump() for t in _path_transactions(G, path, q.amount_in)],
+            "complete": not deadline.hit,
+        }
+    return results
+
+
+def _fan_out(results: dict[str, dict]) -> int:
+    """Store results and push the changed ones to their subscribers. Returns the number of changed queries."""
+    changed = 0
+    for key, result in results.items():
+        if key not in _queries or _last.get(key) == result:
+            continue
+        _last[key] = result
+        changed += 1
+        message = {"event": "update", "id": key, **_snapshot, **result}
+        for client in _subscribers.get(key, ()):
+            client.offer(message)
+    return changed
+
+
+async def publish_snapshot(pools: list, block_number: Optional[int] = None) -> int:
+    """Recompute all subscribed queries on a new pool snapshot and fan out changes."""
+    _snapshot["version"] += 1
+    _snapshot["block_number"] = block_number
+    if not _queries:
+        return 0
+    results = await run_solver(_evaluate, pools, dict(_queries), record=False)
+    return _fan_out(results)
+
+
+async def subscribe(client: FeedClient, sub: FeedSubscription) -> str:
+    """Register client for a query; the current result is sent right away (computed if new)."""
+    key = sub.key
+    client.keys.add(key)
+    _subscribers.setdefault(key, set()).add(client)
+    if key in _last:
+        client.offer({"event": "update", "id": key, **_snapshot, **_last[key]})
+    elif key not in _queries:
+        _queries[key] = sub
+        pools = await get_pharos_fetcher().get_pools()
+        _fan_out(await run_solver(_evaluate, pools, {key: sub}, record=False))
+    return key
+
+
+def unsubscribe(client: FeedClient, key: str) -> None:
+    client.keys.discard(key)
+    clients = _subscribers.get(key)
+    if clients is None:
+        return
+    clients.discard(client)
+    if not clients:
+        # Last subscriber gone: stop computing the query
+        _subscribers.pop(key, None)
+        _queries.pop(key, None)
+        _last.pop(key, None)
+
+
+def disconnect(client: FeedClient) -> None:
+    for key in list(client.keys):
+        unsubscribe(client, key)
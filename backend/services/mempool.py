@@ -0,0 +1,405 @@
+"""
+Mempool ingestion: pending router swaps -> PendingOrder sets -> continuous scheduling.
+
+Each round pulls pending transactions over JSON-RPC, either the full pending block
+(MEMPOOL_SOURCE="block", eth_getBlockByNumber("pending", true)) or the new hashes of a pending-tx
+filter fetched as one batched eth_getTransactionByHash request ("filter", with a block filter
+to drop mined swaps). Uniswap-V2-style router calldata is decoded in one pass over the batch
+(selector table + ABI word slicing, no ABI library per tx). Each hop's pool becomes a read/write key, and the sender's account is a write key
+(nonce order). The order set is then scheduled on the solver pool, and the latest schedule is
+served by GET /api/quantum/mempool/schedule.
+
+`python -m services.mempool serve [port]` runs a local JSON-RPC stand-in that keeps a synthetic
+pending pool of swaps, for trying this without a node.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+from core.config import settings
+from models.quantum import PendingOrder, SchedulerRequest, SchedulerResponse
+from services.solver_pool import run_solver
+
+# selector -> (function name, word index of the address[] path argument)
+SWAP_SELECTORS: dict[bytes, tuple[str, int]] = {
+    bytes.fromhex("38ed1739"): ("swapExactTokensForTokens", 2),
+    bytes.fromhex("8803dbee"): ("swapTokensForExactTokens", 2),
+    bytes.fromhex("7ff36ab5"): ("swapExactETHForTokens", 1),
+    bytes.fromhex("4a25d94a"): ("swapTokensForExactETH", 2),
+    bytes.fromhex("18cbafe5"): ("swapExactTokensForETH", 2),
+    bytes.fromhex("fb3bdb41"): ("swapETHForExactTokens", 1),
+    bytes.fromhex("5c11d795"): ("swapExactTokensForTokensSupportingFeeOnTransferTokens", 2),
+    bytes.fromhex("b6f9de95"): ("swapExactETHForTokensSupportingFeeOnTransferTokens", 1),
+    bytes.fromhex("791ac947"): ("swapExactTokensForETHSupportingFeeOnTransferTokens", 2),
+}
+_MAX_PATH = 8
+_LOOKUP_ATTEMPTS = 3  # rounds a filter hash is looked up while the node does not return its transaction yet
+
+_client = None  # httpx.AsyncClient
+_filter_id: Optional[str] = None
+_block_filter_id: Optional[str] = None
+_unresolved: "OrderedDict[str, int]" = OrderedDict()  # filter hashes not returned yet -> lookups so far
+_orders: "OrderedDict[str, tuple[float, PendingOrder]]" = OrderedDict()  # tx hash -> (first seen, order)
+_seen: "OrderedDict[str, None]" = OrderedDict()  # recently decoded tx hashes (swaps or not), bounded
+_pair_pools: dict[tuple[str, str], str] = {}  # sorted lowercase token pair -> pool address
+_latest: Optional[SchedulerResponse] = None
+_stats: dict = {
+    "rounds": 0, "txs_seen": 0, "swaps_decoded": 0, "skipped": 0, "rpc_errors": 0,
+    "last_error": None, "last_round_at": None, "schedule_ms": None,
+}
+
+
+class DecodedSwap(NamedTuple):
+    tx_hash: str
+    sender: str
+    function: str
+    path: list[str]  # token addresses, lowercase
+    gas: Optional[int]
+
+
+def _word(data: bytes, i: int) -> int:
+    return int.from_bytes(data[32 * i:32 * i + 32], "big")
+
+
+def _decode_swap(tx: dict, routers: Optional[set[str]]) -> Optional[DecodedSwap]:
+    tx_hash = tx["hash"]
+    to = (tx.get("to") or "").lower()
+    data = tx.get("input") or tx.get("data") or "0x"
+    if not isinstance(tx_hash, str) or len(data) < 10 or (routers and to not in routers):
+        return None
+    raw = bytes.fromhex(data[2:])
+    spec = SWAP_SELECTORS.get(raw[:4])
+    if spec is None:
+        return None
+    args = raw[4:]
+    offset = _word(args, spec[1])
+    if offset + 32 > len(args) or offset % 32:
+        return None
+    length = _word(args, offset // 32)
+    if not 2 <= length <= _MAX_PATH or offset + 32 * (length + 1) > len(args):
+        return None
+    base = offset + 32
+    path = ["0x" + args[base + 32 * j + 12:base + 32 * j + 32].hex() for j in range(length)]
+    gas = tx.get("gas")
+    gas = int(gas, 16) if isinstance(gas, str) else gas if isinstance(gas, int) else None
+    return DecodedSwap(tx_hash, (tx.get("from") or "").lower(), spec[0], path, gas)
+
+
+def decode_swaps(txs: list[dict], routers: Optional[set[str]] = None) -> list[DecodedSwap]:
+    """Decode the router swaps in a batch of RPC transaction objects; anything else is skipped.
+
+    Mempool input is untrusted: a malformed transaction (missing hash, odd-length or non-hex
+    calldata, ...) is skipped on its own instead of failing the batch.
+    """
+    decoded = []
+    for tx in txs:
+        try:
+            swap = _decode_swap(tx, routers)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+        if swap is not None:
+            decoded.append(swap)
+    return decoded
+
+
+def _pool_key(a: str, b: str) -> str:
+    pair = (a, b) if a < b else (b, a)
+    return _pair_pools.get(pair) or f"pair:{pair[0]}:{pair[1]}"
+
+
+def to_order(swap: DecodedSwap) -> PendingOrder:
+    """One pool key per hop (read and written); the sender's account is written (nonce order)."""
+    pools = list(dict.fromkeys(_pool_key(a, b) for a, b in zip(swap.path, swap.path[1:])))
+    return PendingOrder(
+        id=swap.tx_hash,
+        type="swap",
+        pair=f"{swap.path[0]}/{swap.path[-1]}",
+        account=swap.sender,
+        reads=pools,
+        writes=pools + [f"account:{swap.sender}"],
+        gas_estimate=swap.gas if swap.gas and swap.gas > 0 else None,
+    )
+
+
+def set_pools(pools: list[dict]) -> None:
+    """Map token pairs to known pool addresses (called on each pool refresh)."""
+    global _pair_pools
+    mapping = {}
+    for p in pools:
+        a, b = p["tokens"][0].lower(), p["tokens"][1].lower()
+        mapping[(a, b) if a < b else (b, a)] = p["address"]
+    _pair_pools = mapping
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        import httpx
+
+        _client = httpx.AsyncClient(timeout=settings.MEMPOOL_RPC_TIMEOUT_SECONDS)
+    return _client
+
+
+async def _rpc_batch(calls: list[tuple[str, list]]) -> list[Any]:
+    """One HTTP round trip for all calls; results in call order (None for per-call errors)."""
+    if not calls:
+        return []
+    payload = [{"jsonrpc": "2.0", "id": i, "method": m, "params": p} for i, (m, p) in enumerate(calls)]
+    response = await _get_client().post(settings.MEMPOOL_RPC_URL or settings.PHAROS_RPC_URL, json=payload)
+    response.raise_for_status()
+    body = response.json()
+    if isinstance(body, dict):  # some nodes answer a failed batch with a single error object
+        raise RuntimeError(body.get("error", {}).get("message", "batch request failed"))
+    results: list[Any] = [None] * len(calls)
+    for item in body:
+        if "error" in item and "filter not found" in str(item["error"]).lower():
+            raise LookupError("pending filter expired")
+        results[item["id"]] = item.get("result")
+    return results
+
+
+async def _pending_txs() -> tuple[list[dict], bool]:
+    """(transactions, is_full_set): the pending block is the full set, filter changes are a delta."""
+    global _filter_id
+    if settings.MEMPOOL_SOURCE.strip().lower() != "filter":
+        (block,) = await _rpc_batch([("eth_getBlockByNumber", ["pending", True])])
+        txs = (block or {}).get("transactions") or []
+        return [tx for tx in txs if isinstance(tx, dict)], True
+    if _filter_id is None:
+        (_filter_id,) = await _rpc_batch([("eth_newPendingTransactionFilter", [])])
+    try:
+        (hashes,) = await _rpc_batch([("eth_getFilterChanges", [_filter_id])])
+    except LookupError:
+        _filter_id = None
+        return [], False
+    # hashes the node did not return yet (propagation lag) are looked up again next round
+    hashes = list(dict.fromkeys([*_unresolved, *(h for h in hashes or [] if isinstance(h, str) and h not in _seen)]))
+    txs = await _rpc_batch([("eth_getTransactionByHash", [h]) for h in hashes])
+    for h, tx in zip(hashes, txs):
+        attempts = 0 if tx else _unresolved.get(h, 0) + 1
+        if 0 < attempts < _LOOKUP_ATTEMPTS:
+            _unresolved[h] = attempts
+        else:
+            _unresolved.pop(h, None)
+    while len(_unresolved) > settings.MEMPOOL_MAX_ORDERS:
+        _unresolved.popitem(last=False)
+    return [tx for tx in txs if isinstance(tx, dict) and tx.get("blockNumber") is None], False
+
+
+async def _mined_hashes() -> set[str]:
+    """Transaction hashes of the blocks mined since the last round (filter mode, via a block filter)."""
+    global _block_filter_id
+    if _block_filter_id is None:
+        (_block_filter_id,) = await _rpc_batch([("eth_newBlockFilter", [])])
+        return set()
+    try:
+        (blocks,) = await _rpc_batch([("eth_getFilterChanges", [_block_filter_id])])
+    except LookupError:
+        _block_filter_id = None
+        return set()
+    bodies = await _rpc_batch([("eth_getBlockByHash", [b, False]) for b in blocks or []])
+    return {h for body in bodies if isinstance(body, dict) for h in body.get("transactions") or [] if isinstance(h, str)}
+
+
+async def ingest_once() -> bool:
+    """One round: fetch, decode the unseen transactions, update the order set; True if the set changed."""
+    txs, full = await _pending_txs()
+    mined = set() if full else await _mined_hashes()
+    fresh = [tx for tx in txs if isinstance(tx.get("hash"), str) and tx["hash"] not in _seen]
+    for tx in fresh:
+        _seen[tx["hash"]] = None
+    while len(_seen) > 4 * settings.MEMPOOL_MAX_ORDERS:
+        _seen.popitem(last=False)
+    routers = {r.strip().lower() for r in settings.MEMPOOL_ROUTERS.split(",") if r.strip()}
+    swaps = decode_swaps(fresh, routers or None)
+    _stats["txs_seen"] += len(fresh)
+    _stats["swaps_decoded"] += len(swaps)
+    _stats["skipped"] += len(fresh) - len(swaps)
+    now = time.time()
+    before = list(_orders)
+    if full:
+        pending = {tx.get("hash") for tx in txs}
+        for tx_hash in [h for h in _orders if h not in pending]:
+            del _orders[tx_hash]  # mined or dropped
+    for tx_hash in mined:
+        _orders.pop(tx_hash, None)
+        _unresolved.pop(tx_hash, None)
+    for swap in swaps:
+        _orders[swap.tx_hash] = (now, to_order(swap))
+    while _orders and now - next(iter(_orders.values()))[0] > settings.MEMPOOL_ORDER_TTL_SECONDS:
+        _orders.popitem(last=False)
+    while len(_orders) > settings.MEMPOOL_MAX_ORDERS:
+        _orders.popitem(last=False)
+    return list(_orders) != before
+
+
+async def schedule_now() -> Optional[SchedulerResponse]:
+    """Schedule the current order set on the solver pool and keep the result."""
+    global _latest
+    if not _orders:
+        _latest = None
+        return None
+    req = SchedulerRequest(
+        pending_orders=[order for _, order in _orders.values()],
+        max_gas_per_slot=settings.MEMPOOL_SLOT_GAS or None,
+    )
+    t0 = time.perf_counter()
+    result = await run_solver(_schedule_for_mempool, req, record=False)
+    _stats["schedule_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    _latest = result
+    return result
+
+
+async def _schedule_for_mempool(req: SchedulerRequest) -> SchedulerResponse:
+    from services.quantum_simulator import solve_scheduler
+
+    result = await solve_scheduler(req)
+    result.conflict_matrix = None  # O(n²) heatmap is not useful at mempool size
+    return result
+
+
+async def ingest_loop() -> None:
+    """Background task: ingest every MEMPOOL_POLL_INTERVAL_SECONDS and reschedule on change."""
+    while True:
+        try:
+            _stats["rounds"] += 1
+            if await ingest_once():
+                await schedule_now()
+            _stats["last_round_at"] = time.time()
+        except Exception as e:
+            _stats["rpc_errors"] += 1
+            _stats["last_error"] = str(e)
+        await asyncio.sleep(settings.MEMPOOL_POLL_INTERVAL_SECONDS)
+
+
+def latest_schedule() -> Optional[SchedulerResponse]:
+    return _latest
+
+
+def mempool_stats() -> dict:
+    if not settings.MEMPOOL_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, "source": settings.MEMPOOL_SOURCE, "orders": len(_orders), **_stats}
+
+
+async def close() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# --- Local JSON-RPC stand-in ---
+
+
+def encode_swap(selector: str, path: list[str], amount: int = 10**18, to: str = "0x" + "ee" * 20) -> str:
+    """Router calldata for one of SWAP_SELECTORS' functions (hex selector)."""
+    sel = bytes.fromhex(selector)
+    path_index = SWAP_SELECTORS[sel][1]
+    words = path_index + 3  # head: amounts..., path offset, to, deadline
+    head = [amount] * path_index + [32 * words, int(to, 16), 2**32]
+    tail = [len(path)] + [int(a, 16) for a in path]
+    return "0x" + (sel + b"".join(w.to_bytes(32, "big") for w in head + tail)).hex()
+
+
+def _serve(port: int) -> None:
+    """JSON-RPC stand-in: a synthetic mempool of router swaps over the demo pools' tokens."""
+    import json
+    import random
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    from services.pharos_fetcher import _demo_pools
+
+    tokens = sorted({t for p in _demo_pools() for t in p["tokens"]})
+    router = "0x7a250d5630b4cf539739df2c5dacb4c659f2488d"
+    selectors = [s.hex() for s in SWAP_SELECTORS]
+    pending: "OrderedDict[str, dict]" = OrderedDict()
+    filters: dict[str, list[str]] = {}
+    block_filters: dict[str, list[str]] = {}
+    blocks: dict[str, list[str]] = {}  # block hash -> mined tx hashes
+    state = {"block": 1, "nonce": 0}
+
+    def new_tx() -> dict:
+        state["nonce"] += 1
+        path = random.sample(tokens, random.choice([2, 2, 3]))
+        tx = {
+            "hash": "0x%064x" % random.getrandbits(256),
+            "from": "0x%040x" % random.randrange(1, 50),
+            "to": random.choice([router] * 9 + ["0x" + "11" * 20]),
+            "gas": hex(random.choice([120_000, 150_000, 180_000, 250_000])),
+            "input": encode_swap(random.choice(selectors), path),
+        }
+        for hashes in filters.values():
+            hashes.append(tx["hash"])
+        return tx
+
+    def tick() -> None:
+        """Every call: a few new txs arrive, and a block occasionally mines the oldest ones."""
+        for _ in range(random.randint(0, 5)):
+            tx = new_tx()
+            pending[tx["hash"]] = tx
+        if random.random() < 0.1:
+            state["block"] += 1
+            block_hash = "0x%064x" % random.getrandbits(256)
+            blocks[block_hash] = [pending.popitem(last=False)[0] for _ in range(min(len(pending), random.randint(5, 30)))]
+            for hashes in block_filters.values():
+                hashes.append(block_hash)
+
+    def call(method: str, params: list) -> Any:
+        if method == "eth_blockNumber":
+            return hex(state["block"])
+        if method == "eth_getBlockByNumber":
+            return {"number": hex(state["block"] + 1), "transactions": list(pending.values())}
+        if method == "eth_newPendingTransactionFilter":
+            fid = hex(len(filters) + len(block_filters) + 1)
+            filters[fid] = list(pending)
+            return fid
+        if method == "eth_newBlockFilter":
+            fid = hex(len(filters) + len(block_filters) + 1)
+            block_filters[fid] = []
+            return fid
+        if method == "eth_getFilterChanges":
+            table = filters if params[0] in filters else block_filters
+            if params[0] not in table:
+                raise LookupError("filter not found")
+            changes, table[params[0]] = table[params[0]], []
+            return changes
+        if method == "eth_getBlockByHash":
+            hashes = blocks.get(params[0])
+            return None if hashes is None else {"hash": params[0], "transactions": hashes}
+        if method == "eth_getTransactionByHash":
+            return pending.get(params[0])
+        raise ValueError(f"method not supported: {method}")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            tick()
+            replies = []
+            for req in body if isinstance(body, list) else [body]:
+                try:
+                    replies.append({"jsonrpc": "2.0", "id": req["id"], "result": call(req["method"], req.get("params", []))})
+                except Exception as e:
+                    replies.append({"jsonrpc": "2.0", "id": req["id"], "error": {"code": -32000, "message": str(e)}})
+            out = json.dumps(replies if isinstance(body, list) else replies[0]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+        def log_message(self, *args):
+            pass
+
+    print(f"JSON-RPC stand-in on http://127.0.0.1:{port} (MEMPOOL_RPC_URL)")
+    HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "serve":
+        sys.exit("usage: python -m services.mempool serve [port]")
+    _serve(int(sys.argv[2]) if len(sys.argv) > 2 else 8545)
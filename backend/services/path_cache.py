@@ -0,0 +1,124 @@
+"""
+Candidate path cache: simple paths per (topology, token_in, token_out, max_hops).
+
+The pool graph's topology (its set of token-pair edges) changes only when pools are added or
+removed; reserve and fee updates keep the same candidate paths, which are then just re-scored.
+Each distinct edge set gets a small id (looked up by the frozen edge set itself, so two
+topologies never share one), entries are keyed by that id, and a topology change misses
+naturally while stale entries age out of the LRU.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Generator, Iterator, Optional
+
+from core.config import settings
+from services.budget import Deadline
+
+_DEADLINE_CHECK_EVERY = 64  # DFS steps between deadline polls
+_MAX_TOPOLOGIES = 32  # edge sets remembered for id lookup; ids are never reused
+
+_cache: "OrderedDict[tuple, list[list[int]]]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+_topologies: "OrderedDict[frozenset, int]" = OrderedDict()
+_next_topology_id = 0
+
+
+def topology_id(G) -> int:
+    """Id of the graph's edge set (computed once per graph; reserves are not part of it)."""
+    global _next_topology_id
+    key = G.graph.get("topology_id")
+    if key is None:
+        edges = frozenset(G.edges())
+        with _lock:
+            key = _topologies.get(edges)
+            if key is None:
+                key = _topologies[edges] = _next_topology_id
+                _next_topology_id += 1
+                if len(_topologies) > _MAX_TOPOLOGIES:
+                    _topologies.popitem(last=False)
+            else:
+                _topologies.move_to_end(edges)
+        G.graph["topology_id"] = key
+    return key
+
+
+def path_cache_stats() -> dict:
+    with _lock:
+        return {**_stats, "entries": len(_cache), "max_entries": settings.PATH_CACHE_SIZE}
+
+
+def _simple_paths(
+    G, source, target, cutoff: int, deadline: Optional[Deadline]
+) -> Generator[list, None, bool]:
+    """Depth-first simple paths source -> target of at most `cutoff` edges (networkx order).
+
+    Polls the deadline inside the search, so a graph with many dead ends but no path to `target`
+    is cut off too. Returns False if the deadline stopped it.
+    """
+    if cutoff < 1 or source == target:
+        return True
+    path, on_path = [source], {source}
+    stack = [iter(G.successors(source))]
+    steps = 0
+    while stack:
+        steps += 1
+        if deadline is not None and steps % _DEADLINE_CHECK_EVERY == 0 and deadline.expired():
+            return False
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            on_path.discard(path.pop())
+        elif child == target:
+            yield path + [child]
+        elif child not in on_path and len(path) < cutoff:
+            path.append(child)
+            on_path.add(child)
+            stack.append(iter(G.successors(child)))
+    return True
+
+
+def iter_candidate_paths(
+    G, token_in: int, token_out: int, max_hops: int, deadline: Optional[Deadline] = None
+) -> Iterator[list[int]]:
+    """Simple paths token_in -> token_out up to max_hops, from cache when the topology is unchanged.
+
+    On a miss the paths are enumerated lazily and cached only if the enumeration finished (the
+    caller consumed them all and the deadline did not cut it) and there are at most
+    PATH_CACHE_MAX_PATHS of them. Cached paths are shared: callers must not mutate them.
+    """
+    if token_in not in G or token_out not in G:
+        return
+    key = (topology_id(G), token_in, token_out, max_hops)
+    with _lock:
+        paths = _cache.get(key)
+        if paths is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+    if paths is not None:
+        yield from paths
+        return
+
+    found: list[list[int]] | None = []
+    search = _simple_paths(G, token_in, token_out, max_hops, deadline)
+    while True:
+        try:
+            path = next(search)
+        except StopIteration as done:
+            complete = done.value
+            break
+        if found is not None:
+            found.append(path)
+            if len(found) > settings.PATH_CACHE_MAX_PATHS:
+                found = None
+        yield path
+    if not complete or found is None or settings.PATH_CACHE_SIZE <= 0:
+        return
+    with _lock:
+        _cache[key] = found
+        _cache.move_to_end(key)
+        while len(_cache) > settings.PATH_CACHE_SIZE:
+            _cache.popitem(last=False)
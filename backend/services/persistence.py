@@ -0,0 +1,258 @@
+"""
+Persistence: solver runs (request, result, stage timings) and periodic pool snapshots.
+
+Recording never blocks a request. Records go into a bounded in-memory queue (new records are
+dropped and counted when it is full), and a background task flushes them in batches: COPY into
+Postgres via asyncpg, or a multi-row executemany into SQLite when DATABASE_URL is
+`sqlite:///path` (local stand-in). Serialization happens at flush time, off the event loop.
+Disabled unless PERSIST_ENABLED is set; Postgres stays optional.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from core.config import settings
+
+_RUN_COLUMNS = (
+    "run_id", "created_at", "solver", "status", "request", "result",
+    "budget_exhausted", "queue_ms", "solve_ms", "stage_timings",
+)
+_SNAPSHOT_COLUMNS = ("taken_at", "block_number", "pool_count", "pools")
+
+_POSTGRES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solver_runs (
+    run_id UUID PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL,
+    solver TEXT NOT NULL,
+    status TEXT NOT NULL,
+    request JSONB,
+    result JSONB,
+    budget_exhausted BOOLEAN,
+    queue_ms DOUBLE PRECISION,
+    solve_ms DOUBLE PRECISION,
+    stage_timings JSONB
+);
+CREATE INDEX IF NOT EXISTS solver_runs_solver_created ON solver_runs (solver, created_at);
+CREATE TABLE IF NOT EXISTS pool_snapshots (
+    taken_at TIMESTAMPTZ NOT NULL,
+    block_number BIGINT,
+    pool_count INTEGER NOT NULL,
+    pools JSONB NOT NULL
+);
+"""
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solver_runs (
+    run_id TEXT PRIMARY KEY, created_at TEXT NOT NULL, solver TEXT NOT NULL, status TEXT NOT NULL,
+    request TEXT, result TEXT, budget_exhausted INTEGER, queue_ms REAL, solve_ms REAL, stage_timings TEXT
+);
+CREATE TABLE IF NOT EXISTS pool_snapshots (
+    taken_at TEXT NOT NULL, block_number INTEGER, pool_count INTEGER NOT NULL, pools TEXT NOT NULL
+);
+"""
+
+_pending: deque = deque()  # ("run" | "snapshot", captured fields); bounded by PERSIST_QUEUE_SIZE
+_stats: dict = {"written": 0, "dropped": 0, "failed": 0, "last_flush_at": None, "last_error": None}
+_wake: Optional[asyncio.Event] = None
+_sink = None
+_last_snapshot_at = 0.0
+
+
+def _enqueue(item: tuple) -> None:
+    if len(_pending) >= settings.PERSIST_QUEUE_SIZE:
+        _stats["dropped"] += 1
+        return
+    _pending.append(item)
+    if _wake is not None and len(_pending) >= settings.PERSIST_BATCH_SIZE:
+        _wake.set()
+
+
+def record_run(solver: str, args: tuple, result: Any, status: str, timings: dict) -> None:
+    """Queue one solver run (called on the event loop; models are serialized at flush time)."""
+    if settings.PERSIST_ENABLED:
+        _enqueue(("run", time.time(), solver, args, result, status, timings))
+
+
+def record_pool_snapshot(pools: list[dict], block_number: Optional[int]) -> None:
+    """Queue a pool snapshot, at most once per POOL_SNAPSHOT_INTERVAL_SECONDS."""
+    global _last_snapshot_at
+    now = time.time()
+    if not settings.PERSIST_ENABLED or now - _last_snapshot_at < settings.POOL_SNAPSHOT_INTERVAL_SECONDS:
+        return
+    _last_snapshot_at = now
+    _enqueue(("snapshot", now, block_number, pools))
+
+
+def persistence_stats() -> dict:
+    if not settings.PERSIST_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, "connected": _sink is not None, "queued": len(_pending), **_stats}
+
+
+def _json(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(mode="json")
+    return json.dumps(value, default=str)
+
+
+def _stage_timings(result: Any, timings: dict) -> dict:
+    """Queue/solve wall time plus the per-stage *_ms figures the solver reported."""
+    stages = dict(timings)
+    comparison = getattr(result, "comparison", None)
+    if comparison is not None:
+        stages.update({k: v for k, v in comparison.model_dump().items() if k.endswith("_time_ms")})
+    metrics = getattr(result, "quantum_metrics", None) or (result.get("quantum_metrics") if isinstance(result, dict) else None)
+    if metrics:
+        stages.update({k: v for k, v in metrics.items() if k.endswith("_ms") and k != "time_budget_ms"})
+    return stages
+
+
+def _rows(batch: list[tuple]) -> tuple[list[tuple], list[tuple]]:
+    """Serialize a batch into (solver_runs rows, pool_snapshots rows)."""
+    runs, snapshots = [], []
+    for item in batch:
+        at = datetime.fromtimestamp(item[1], tz=timezone.utc)
+        if item[0] == "run":
+            _, _, solver, args, result, status, timings = item
+            request = args[0] if len(args) == 1 else list(args)
+            exhausted = getattr(result, "budget_exhausted", None)
+            if isinstance(result, dict):
+                exhausted = result.get("budget_exhausted")
+            runs.append((
+                uuid.uuid4(), at, solver, status, _json(request), _json(result),
+                exhausted, timings.get("queue_ms"), timings.get("solve_ms"), _json(_stage_timings(result, timings)),
+            ))
+        else:
+            _, _, block_number, pools = item
+            snapshots.append((at, block_number, len(pools), _json(pools)))
+    return runs, snapshots
+
+
+class _PostgresSink:
+    def __init__(self, dsn: str):
+        self._dsn = dsn
+        self._pool = None
+
+    async def open(self) -> None:
+        import asyncpg
+
+        self._pool = await asyncpg.create_pool(self._dsn, min_size=1, max_size=settings.PERSIST_POOL_SIZE)
+        async with self._pool.acquire() as conn:
+            await conn.execute(_POSTGRES_SCHEMA)
+
+    async def write(self, runs: list[tuple], snapshots: list[tuple]) -> None:
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                if runs:
+                    await conn.copy_records_to_table("solver_runs", records=runs, columns=_RUN_COLUMNS)
+                if snapshots:
+                    await conn.copy_records_to_table("pool_snapshots", records=snapshots, columns=_SNAPSHOT_COLUMNS)
+
+    async def close(self) -> None:
+        await self._pool.close()
+
+
+class _SQLiteSink:
+    def __init__(self, path: str):
+        self._path = path
+        self._conn = None
+
+    async def open(self) -> None:
+        import sqlite3
+
+        def connect():
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.executescript(_SQLITE_SCHEMA)
+            return conn
+
+        self._conn = await asyncio.to_thread(connect)
+
+    def _write(self, runs: list[tuple], snapshots: list[tuple]) -> None:
+        def text(row):
+            return tuple(v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, uuid.UUID) else v for v in row)
+
+        with self._conn:
+            if runs:
+                self._conn.executemany(
+                    f"INSERT INTO solver_runs ({', '.join(_RUN_COLUMNS)}) VALUES ({', '.join('?' * len(_RUN_COLUMNS))})",
+                    [text(r) for r in runs],
+                )
+            if snapshots:
+                self._conn.executemany(
+                    f"INSERT INTO pool_snapshots ({', '.join(_SNAPSHOT_COLUMNS)}) VALUES (?, ?, ?, ?)",
+                    [text(s) for s in snapshots],
+                )
+
+    async def write(self, runs: list[tuple], snapshots: list[tuple]) -> None:
+        await asyncio.to_thread(self._write, runs, snapshots)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self._conn.close)
+
+
+def _make_sink():
+    url = settings.DATABASE_URL
+    if url.startswith("sqlite:///"):
+        return _SQLiteSink(url[len("sqlite:///"):])
+    # SQLAlchemy-style URL (postgresql+asyncpg://) -> plain libpq DSN for asyncpg
+    return _PostgresSink(url.replace("postgresql+asyncpg://", "postgresql://", 1))
+
+
+async def flush() -> int:
+    """Write everything queued, PERSIST_BATCH_SIZE records per batch. Returns records written."""
+    global _sink
+    if _sink is None:
+        sink = _make_sink()
+        try:
+            await sink.open()
+        except Exception as e:
+            _stats["last_error"] = f"connect: {e}"
+            return 0  # records stay queued (bounded) until the database is reachable
+        _sink = sink
+    written = 0
+    while _pending:
+        batch = [_pending.popleft() for _ in range(min(settings.PERSIST_BATCH_SIZE, len(_pending)))]
+        try:
+            runs, snapshots = await asyncio.to_thread(_rows, batch)
+            await _sink.write(runs, snapshots)
+        except Exception as e:
+            # Drop the batch rather than retry forever; the failure is visible in persistence_stats()
+            _stats["failed"] += len(batch)
+            _stats["last_error"] = str(e)
+            continue
+        written += len(batch)
+    _stats["written"] += written
+    _stats["last_flush_at"] = time.time()
+    return written
+
+
+async def flush_loop() -> None:
+    """Background task: flush every PERSIST_FLUSH_INTERVAL_SECONDS, or sooner once a batch is full."""
+    global _wake, _sink
+    _wake = asyncio.Event()
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(_wake.wait(), timeout=settings.PERSIST_FLUSH_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            _wake.clear()
+            try:
+                await flush()
+            except Exception as e:
+                _stats["last_error"] = str(e)
+    finally:
+        if _sink is not None:
+            try:
+                await flush()
+                await _sink.close()
+            except Exception:
+                pass
+            _sink = None
@@ -3,13 +3,20 @@ Pharos Testnet (AtlanticOcean) data fetcher.
 Fetches DEX pool data and caches in Redis. Falls back to demo data if RPC unavailable.
 """
 
+import asyncio
+import time
 from typing import Any
 
 from core.config import settings
+from services import redis_client
 
-# Optional: web3 and redis. Graceful fallback if not configured.
+# Optional: web3 (redis via services.redis_client). Graceful fallback if not configured.
 _w3 = None
-_redis = None
+
+# Redis layout: one key per pool plus an address index and snapshot metadata
+_POOL_KEY = "qhda:pool:"
+_INDEX_KEY = "qhda:pools:index"
+_META_KEY = "qhda:pools:meta"
 
 
 def _get_web3():
@@ -23,18 +30,6 @@ def _get_web3():
     return _w3 if _w3 else None
 
 
-async def _get_redis():
-    global _redis
-    if _redis is None:
-        try:
-            import redis.asyncio as redis
-            _redis = redis.from_url(settings.REDIS_URL)
-            await _redis.ping()
-        except Exception:
-            _redis = False
-    return _redis if _redis else None
-
-
 # Standard 3-token demo (USDC, WETH, USDT)
 def _demo_pools() -> list[dict[str, Any]]:
     """Fallback demo pools when Pharos RPC is unavailable or no factory is set."""
@@ -78,6 +73,31 @@ class PharosDataFetcher:
         self._connected = False
         self._block_number: int | None = None
         self._chain_id: int | None = None
+        # Pool snapshot metadata: when and at which block the current pool set was fetched
+        self._snapshot_at: float | None = None
+        self._snapshot_block: int | None = None
+        self._network_stats: tuple[float, dict] | None = None  # (fetched at, stats) for get_network_stats_cached
+
+    def snapshot_info(self) -> dict:
+        """Age, fetch time and block of the current pool snapshot (None when nothing was fetched yet)."""
+        age = round(time.time() - self._snapshot_at, 2) if self._snapshot_at else None
+        return {"age_seconds": age, "fetched_at": self._snapshot_at, "block_number": self._snapshot_block}
+
+    async def probe_rpc(self) -> dict:
+        """Measure RPC reachability/latency and block lag of the pool snapshot vs chain head."""
+        w3 = _get_web3()
+        if not w3:
+            return {"reachable": False, "latency_ms": None, "block_number": None, "block_lag": None}
+        t0 = time.perf_counter()
+        try:
+            # web3 HTTPProvider is synchronous; keep it off the event loop
+            head = await asyncio.to_thread(lambda: w3.eth.block_number)
+        except Exception as e:
+            return {"reachable": False, "latency_ms": None, "block_number": None, "block_lag": None, "error": str(e)}
+        latency_ms = round((time.perf_counter() - t0) * 1000, 2)
+        self._block_number = head
+        lag = head - self._snapshot_block if self._snapshot_block is not None else None
+        return {"reachable": True, "latency_ms": latency_ms, "block_number": head, "block_lag": lag}
 
     async def get_network_stats(self) -> dict:
         """Check connection to Pharos RPC and return block/chain info."""
@@ -115,17 +135,33 @@ class PharosDataFetcher:
                 "gas_price": None,
             }
 
+    async def get_network_stats_cached(self, max_age: float) -> dict:
+        """get_network_stats, reused for max_age seconds (dashboard polls share one set of RPC calls)."""
+        cached = self._network_stats
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        stats = await self.get_network_stats()
+        self._network_stats = (time.monotonic(), stats)
+        return stats
+
     async def get_pools(self) -> list[dict]:
-        """Return pools from Redis cache or fetch from chain; fallback to demo data."""
-        redis = await _get_redis()
-        if redis:
-            try:
-                import json
-                raw = await redis.get("qhda:pools")
-                if raw:
-                    return json.loads(raw)
-            except Exception:
-                pass
+        """Return pools from shared memory (reader workers), Redis cache or chain; fallback to demo data."""
+        if settings.POOL_SHM_MODE != "off":
+            from services import shared_pools
+
+            if shared_pools.role() == "reader":
+                snapshot = shared_pools.attach()
+                if snapshot is not None:
+                    self._snapshot_at = snapshot.fetched_at
+                    self._snapshot_block = snapshot.block_number
+                    return snapshot.to_dicts()
+
+        cached = await self._read_cached_pools()
+        if cached is not None:
+            return cached
+        # Redis unavailable: keep serving this process's snapshot until it is TTL-old
+        if self._pools_cache is not None and self._snapshot_at and time.time() - self._snapshot_at < settings.POOL_CACHE_TTL_SECONDS:
+            return self._pools_cache
 
         w3 = _get_web3()
         stats = await self.get_network_stats()
@@ -134,18 +170,40 @@ class PharosDataFetcher:
             # For PoC we use demo data; real implementation would iterate factory.getAllPairs()
             pass
         pools = _demo_pools()
+        self._pools_cache = pools
+        self._snapshot_at = time.time()
+        self._snapshot_block = stats.get("block_number")
+
+        items = {_POOL_KEY + p["address"]: p for p in pools}
+        items[_INDEX_KEY] = [p["address"] for p in pools]
+        items[_META_KEY] = {"fetched_at": self._snapshot_at, "block_number": self._snapshot_block}
+        await redis_client.set_json_many(items, ex=settings.POOL_CACHE_TTL_SECONDS)
+        return pools
 
-        if redis:
-            try:
-                import json
-                await redis.set(
-                    "qhda:pools",
-                    json.dumps(pools),
-                    ex=settings.POOL_CACHE_TTL_SECONDS,
-                )
-            except Exception:
-                pass
-
+    async def _read_cached_pools(self) -> list[dict] | None:
+        """Pools from Redis: index + metadata in one MGET, then all pool keys in one MGET.
+
+        The second MGET is skipped when the metadata names the snapshot already held in memory.
+        Returns None (refetch) if Redis is unavailable or any key expired.
+        """
+        head = await redis_client.mget_json(_META_KEY, _INDEX_KEY)
+        if not head or head[1] is None:
+            return None
+        meta, addresses = head
+        if (
+            meta
+            and self._pools_cache is not None
+            and meta.get("fetched_at") == self._snapshot_at
+            and len(addresses) == len(self._pools_cache)
+        ):
+            return self._pools_cache
+        pools = await redis_client.mget_json(*(_POOL_KEY + a for a in addresses))
+        if pools is None or any(p is None for p in pools):
+            return None
+        if meta:
+            self._snapshot_at = meta.get("fetched_at")
+            self._snapshot_block = meta.get("block_number")
+            self._pools_cache = pools
         return pools
 
 
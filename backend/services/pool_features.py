@@ -0,0 +1,137 @@
+"""
+Streaming per-pool features for the pool risk classifier.
+
+Every pool snapshot from the refresh loop updates each pool's statistics in O(1):
+- volatility: Welford mean / variance of log-price increments, each scaled by 1/sqrt(seconds
+  since the pool's previous snapshot) so irregular refresh spacing does not bias it;
+  annualized when read;
+- turnover: EWMA of |d reserve0| / reserve0 between snapshots (volume proxy);
+- concentration: the largest share the pool holds of either of its tokens' total reserves
+  across the snapshot.
+State is a set of parallel numpy arrays with one row per pool address (grown by doubling), so
+an update is a few vector operations and the classifier reads many pools with one gather.
+Snapshots are deduplicated by their fetch time; the store is per process.
+"""
+
+import threading
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+from core.config import settings
+from services.pool_table import PoolTable
+
+_SECONDS_PER_YEAR = 365 * 24 * 3600
+_MIN_SAMPLES = 2  # log-price increments before a volatility is reported
+
+
+class PoolFeatures:
+    def __init__(self, capacity: int = 64):
+        self._lock = threading.Lock()
+        self._rows: dict[str, int] = {}  # lowercase address -> row
+        self._addresses: list[str] = []
+        self._last_at: Optional[float] = None
+        self._alloc(capacity)
+
+    def _alloc(self, capacity: int) -> None:
+        def grow(name: str, dtype, fill) -> None:
+            old = getattr(self, name, None)
+            new = np.full(capacity, fill, dtype=dtype)
+            if old is not None:
+                new[: len(old)] = old
+            setattr(self, name, new)
+
+        grow("_count", np.int64, 0)  # Welford sample count
+        grow("_mean", np.float64, 0.0)
+        grow("_m2", np.float64, 0.0)
+        grow("_log_price", np.float64, np.nan)  # last observed log(reserve1 / reserve0)
+        grow("_reserve0", np.float64, np.nan)
+        grow("_at", np.float64, np.nan)  # time of the last observation
+        grow("_turnover", np.float64, np.nan)
+        grow("_concentration", np.float64, np.nan)
+
+    def _row(self, address: str) -> int:
+        key = address.lower()
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = len(self._addresses)
+            self._addresses.append(address)
+            if row >= len(self._count):
+                self._alloc(2 * len(self._count))
+        return row
+
+    def update(self, pools: Iterable, at: Optional[float] = None) -> int:
+        """Fold one pool snapshot into the statistics; returns pools updated (0 for a repeated snapshot)."""
+        at = time.time() if at is None else at
+        table = PoolTable.from_pools(pools)
+        with self._lock:
+            if self._last_at is not None and at <= self._last_at:
+                return 0
+            self._last_at = at
+            rows = np.array([self._row(a) for a in table.addresses], dtype=np.int64)
+            r0, r1 = table.reserve0, table.reserve1
+            valid = (r0 > 0) & (r1 > 0)
+            rows, r0, r1 = rows[valid], r0[valid], r1[valid]
+            t0, t1 = table.token0[valid], table.token1[valid]
+            log_price = np.log(r1 / r0)
+
+            dt = at - self._at[rows]
+            step = ~np.isnan(dt) & (dt > 0)  # NaN for a pool's first observation
+            if step.any():
+                r = rows[step]
+                x = (log_price[step] - self._log_price[r]) / np.sqrt(dt[step])
+                n = self._count[r] + 1
+                delta = x - self._mean[r]
+                mean = self._mean[r] + delta / n
+                self._m2[r] += delta * (x - mean)
+                self._mean[r] = mean
+                self._count[r] = n
+                turnover = np.abs(r0[step] - self._reserve0[r]) / self._reserve0[r]
+                previous = self._turnover[r]
+                alpha = settings.POOL_FEATURES_EWMA_ALPHA
+                self._turnover[r] = np.where(np.isnan(previous), turnover, alpha * turnover + (1 - alpha) * previous)
+
+            totals = np.bincount(t0, r0, len(table.tokens)) + np.bincount(t1, r1, len(table.tokens))
+            self._concentration[rows] = np.maximum(r0 / totals[t0], r1 / totals[t1])
+            self._log_price[rows] = log_price
+            self._reserve0[rows] = r0
+            self._at[rows] = at
+            return len(rows)
+
+    def lookup(self, addresses: list[str]) -> dict[str, np.ndarray]:
+        """Feature columns for `addresses` (NaN where a pool is unknown or has too few samples)."""
+        with self._lock:
+            rows = np.array([self._rows.get(a.lower(), -1) for a in addresses], dtype=np.int64)
+            known = rows >= 0
+            r = rows[known]
+            out = {name: np.full(len(addresses), np.nan) for name in ("volatility", "turnover", "concentration")}
+            samples = np.zeros(len(addresses), dtype=np.int64)
+            count = self._count[r]
+            variance = np.where(count >= _MIN_SAMPLES, self._m2[r] / np.maximum(count - 1, 1), np.nan)
+            out["volatility"][known] = np.sqrt(variance * _SECONDS_PER_YEAR)
+            out["turnover"][known] = self._turnover[r]
+            out["concentration"][known] = self._concentration[r]
+            samples[known] = count
+            out["samples"] = samples
+            return out
+
+    def addresses(self) -> list[str]:
+        with self._lock:
+            return list(self._addresses)
+
+    def stats(self) -> dict:
+        with self._lock:
+            ready = int((self._count[: len(self._addresses)] >= _MIN_SAMPLES).sum())
+            age = round(time.time() - self._last_at, 2) if self._last_at else None
+            return {"pools": len(self._addresses), "with_volatility": ready, "last_update_age_seconds": age}
+
+
+_features: Optional[PoolFeatures] = None
+
+
+def get_pool_features() -> PoolFeatures:
+    global _features
+    if _features is None:
+        _features = PoolFeatures()
+    return _features
@@ -0,0 +1,142 @@
+"""
+PoolTable: struct-of-arrays pool representation used inside the solvers.
+
+Token addresses are interned to small ints, case-insensitively (checksummed and lowercase
+spellings of one address are the same token; the first spelling seen is kept for output). The
+ints are also the pool graph's nodes, so routing never hashes address strings.
+Reserves and fees live in typed numpy arrays. Dicts and Pydantic models are converted only at
+the edges (request parsing, demo/Redis data, API responses).
+"""
+
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+
+class PoolTable:
+    __slots__ = ("tokens", "_index", "addresses", "token0", "token1", "reserve0", "reserve1", "fee_bps")
+
+    def __init__(
+        self,
+        tokens: list[str],
+        addresses: list[str],
+        token0: np.ndarray,
+        token1: np.ndarray,
+        reserve0: np.ndarray,
+        reserve1: np.ndarray,
+        fee_bps: np.ndarray,
+    ):
+        self.tokens = tokens  # token id -> address (first spelling seen)
+        self._index = {t.lower(): i for i, t in enumerate(tokens)}
+        self.addresses = addresses
+        self.token0 = token0  # int32 token ids
+        self.token1 = token1
+        self.reserve0 = reserve0  # float64
+        self.reserve1 = reserve1
+        self.fee_bps = fee_bps  # int32 basis points
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    @classmethod
+    def from_pools(cls, pools: Iterable[Any]) -> "PoolTable":
+        """From dict pools (demo data, Redis cache) or PoolInput models, without model_dump()."""
+        tokens: list[str] = []
+        index: dict[str, int] = {}
+
+        def intern(token: str) -> int:
+            key = token.lower()
+            i = index.get(key)
+            if i is None:
+                i = index[key] = len(tokens)
+                tokens.append(token)
+            return i
+
+        addresses, t0, t1, r0, r1, fees = [], [], [], [], [], []
+        for p in pools:
+            if isinstance(p, dict):
+                address, pair, reserves, fee = p["address"], p["tokens"], p["reserves"], p.get("fee", 300)
+            else:
+                address, pair, reserves, fee = p.address, p.tokens, p.reserves, p.fee
+            addresses.append(address)
+            t0.append(intern(pair[0]))
+            t1.append(intern(pair[1]))
+            r0.append(reserves[0])
+            r1.append(reserves[1])
+            fees.append(fee)
+        return cls(
+            tokens,
+            addresses,
+            np.array(t0, dtype=np.int32),
+            np.array(t1, dtype=np.int32),
+            np.array(r0, dtype=np.float64),
+            np.array(r1, dtype=np.float64),
+            np.array(fees, dtype=np.int32),
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        tokens: list[str],
+        addresses: list[str],
+        token_pairs: list[tuple[int, int]],
+        reserves: list[tuple[float, float]],
+        fees: list[int],
+    ) -> "PoolTable":
+        """From parallel arrays (token_pairs index into tokens); duplicate spellings of a token are merged."""
+        interned: list[str] = []
+        index: dict[str, int] = {}
+        remap = np.empty(len(tokens), dtype=np.int32)
+        for i, token in enumerate(tokens):
+            remap[i] = index.setdefault(token.lower(), len(interned))
+            if remap[i] == len(interned):
+                interned.append(token)
+        pairs = np.asarray(token_pairs, dtype=np.int32).reshape(-1, 2)
+        res = np.asarray(reserves, dtype=np.float64).reshape(-1, 2)
+        return cls(
+            interned,
+            list(addresses),
+            remap[pairs[:, 0]],
+            remap[pairs[:, 1]],
+            res[:, 0].copy(),
+            res[:, 1].copy(),
+            np.asarray(fees, dtype=np.int32),
+        )
+
+    def node(self, token: str) -> int:
+        """Pool-graph node of `token` (its token id); -1, which is in no graph, if the table lacks it."""
+        i = self._index.get(token.lower())
+        return -1 if i is None else i
+
+    def names(self, path: Iterable[int], *fallback: str) -> list[str]:
+        """Token spellings of a path of graph nodes (API edge).
+
+        An unknown (-1) node only occurs in the trivial path of a query whose token is not in the
+        table; it is shown as the queried spelling at the same position in `fallback`.
+        """
+        tokens = self.tokens
+        return [tokens[i] if i >= 0 else fallback[min(k, len(fallback) - 1)] for k, i in enumerate(path)]
+
+    def id_rows(self) -> Iterator[tuple[str, int, int, float, float, int]]:
+        """(address, token0 id, token1 id, reserve0, reserve1, fee_bps) per pool."""
+        return zip(
+            self.addresses,
+            self.token0.tolist(),
+            self.token1.tolist(),
+            self.reserve0.tolist(),
+            self.reserve1.tolist(),
+            self.fee_bps.tolist(),
+        )
+
+    def rows(self) -> Iterator[tuple[str, str, str, float, float, int]]:
+        """(address, token0, token1, reserve0, reserve1, fee_bps) per pool, tokens as canonical strings."""
+        tokens = self.tokens
+        for address, i0, i1, r0, r1, fee in self.id_rows():
+            yield address, tokens[i0], tokens[i1], r0, r1, fee
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """Pools in the fetcher's dict format (API edge)."""
+        return [
+            {"address": address, "tokens": [t0, t1], "reserves": [r0, r1], "fee": fee}
+            for address, t0, t1, r0, r1, fee in self.rows()
+        ]
@@ -0,0 +1,206 @@
+"""
+Server-side position book, indexed by health factor.
+
+Clients push incremental updates (upserted / removed positions, changed prices) instead of
+re-sending the whole book. Health factors are recomputed only for positions holding a token
+whose price changed (token -> positions index). Positions are kept in a list sorted by
+(health_factor, position_id), so the liquidatable frontier is a prefix found by bisection, and
+top-K queries under gas / liquidity caps walk that prefix without touching the rest of the book.
+The book lives in process memory (one per uvicorn worker).
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Optional
+
+from core.config import settings
+from models.quantum import (
+    LiquidatableQuery,
+    LiquidatableResponse,
+    PositionBookResponse,
+    PositionBookUpdate,
+    StorePosition,
+)
+from services.budget import Deadline
+from services.quantum_simulator import _gas_est, _iter_under_constraints, _recovery_score
+
+# Re-scoring more than this share of the book re-sorts it instead of moving entries one by one
+_RESORT_FRACTION = 0.125
+
+
+class _Entry:
+    """Stored position in the shape _iter_under_constraints reads."""
+
+    __slots__ = ("position_id", "collateral", "debt_amounts", "fixed_health", "liquidation_bonus", "gas_estimate", "health_factor")
+
+    def __init__(self, p: StorePosition):
+        self.position_id = p.position_id
+        self.collateral = dict(p.collateral)
+        self.debt_amounts = dict(p.debt)
+        self.fixed_health = p.health_factor
+        self.liquidation_bonus = p.liquidation_bonus
+        self.gas_estimate = p.gas_estimate
+        self.health_factor: Optional[float] = None  # None until scored and indexed
+
+    def tokens(self) -> set[str]:
+        return set(self.collateral) | set(self.debt_amounts)
+
+
+class PositionStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Entry] = {}
+        self._index: list[tuple[float, str]] = []  # sorted (health_factor, position_id)
+        self._by_token: dict[str, set[str]] = {}
+        self._prices: dict[str, float] = {}
+        self._thresholds: dict[str, float] = {}
+
+    def _health(self, e: _Entry) -> float:
+        if e.fixed_health is not None:
+            return e.fixed_health
+        prices, thresholds, default_threshold = self._prices, self._thresholds, settings.LIQUIDATION_THRESHOLD_DEFAULT
+        try:
+            debt = sum([prices[t] * a for t, a in e.debt_amounts.items()])
+            collateral = sum([prices[t] * a * thresholds.get(t, default_threshold) for t, a in e.collateral.items()])
+        except KeyError:
+            return math.inf  # unpriced: not liquidatable until every token has a price
+        return collateral / debt if debt > 0 else math.inf
+
+    def _unindex(self, e: _Entry) -> None:
+        if e.health_factor is None:
+            return
+        i = bisect.bisect_left(self._index, (e.health_factor, e.position_id))
+        if i < len(self._index) and self._index[i][1] == e.position_id:
+            del self._index[i]
+
+    def _rescore(self, ids: set[str]) -> int:
+        """Recompute health for ids and move them in the index (or re-sort when many changed)."""
+        entries = [self._entries[i] for i in ids if i in self._entries]
+        if len(entries) > _RESORT_FRACTION * len(self._entries):
+            for e in entries:
+                e.health_factor = self._health(e)
+            self._index = sorted((e.health_factor, e.position_id) for e in self._entries.values())
+            return len(entries)
+        for e in entries:
+            health = self._health(e)
+            if health != e.health_factor:
+                self._unindex(e)  # no-op for a new entry
+                e.health_factor = health
+                bisect.insort(self._index, (health, e.position_id))
+        return len(entries)
+
+    def _remove(self, position_id: str) -> bool:
+        e = self._entries.pop(position_id, None)
+        if e is None:
+            return False
+        self._unindex(e)
+        for token in e.tokens():
+            holders = self._by_token.get(token)
+            if holders is not None:
+                holders.discard(position_id)
+                if not holders:
+                    del self._by_token[token]
+        return True
+
+    def apply(self, update: PositionBookUpdate) -> PositionBookResponse:
+        t0 = time.perf_counter()
+        with self._lock:
+            removed = sum(self._remove(i) for i in update.remove)
+            dirty: set[str] = set()
+            for p in update.positions:
+                self._remove(p.position_id)
+                e = _Entry(p)
+                self._entries[e.position_id] = e
+                for token in e.tokens():
+                    self._by_token.setdefault(token, set()).add(e.position_id)
+                dirty.add(e.position_id)
+            if update.liquidation_thresholds:
+                changed = {t for t, v in update.liquidation_thresholds.items() if self._thresholds.get(t) != v}
+                self._thresholds.update(update.liquidation_thresholds)
+                for token in changed:
+                    dirty |= self._by_token.get(token, set())
+            if update.prices:
+                for token, price in update.prices.items():
+                    if self._prices.get(token) != price:
+                        self._prices[token] = price
+                        dirty |= self._by_token.get(token, set())
+            rescored = self._rescore(dirty)
+            return PositionBookResponse(
+                book_size=len(self._entries),
+                liquidatable=self._frontier_end(1.0),
+                upserted=len(update.positions),
+                removed=removed,
+                rescored=rescored,
+                unpriced=len(self._index) - bisect.bisect_left(self._index, (math.inf, "")),
+                simulation_time=round((time.perf_counter() - t0) * 1000, 2),
+            )
+
+    def _frontier_end(self, max_health: float) -> int:
+        return bisect.bisect_left(self._index, (max_health, ""))
+
+    def liquidatable(self, q: LiquidatableQuery) -> LiquidatableResponse:
+        """Top-k of the frontier (health < max_health) that fit the gas / liquidity caps."""
+        t0 = time.perf_counter()
+        deadline = Deadline.from_request(q.time_budget_ms)
+        with self._lock:
+            end = self._frontier_end(q.max_health)
+            frontier = [self._entries[pid] for _, pid in self._index[:end]]
+            book_size = len(self._entries)
+            # The frontier is already in health order; recovery order re-sorts only the frontier
+            order_key = (lambda e: e.health_factor) if q.order == "health" else (lambda e: -_recovery_score(e))
+            picks = _iter_under_constraints(frontier, q.max_gas_per_block, q.available_liquidity, order_key, deadline)
+            selected: list[_Entry] = []
+            gas_used, violation = 0, None
+            while len(selected) < q.k:
+                try:
+                    selected.append(next(picks))
+                except StopIteration as done:
+                    gas_used, violation = done.value
+                    break
+            else:
+                gas_used = sum(_gas_est(e) for e in selected)
+            strategy = [
+                {"position": e.position_id, "health_factor": round(e.health_factor, 6), "action": "liquidate", "priority": i + 1}
+                for i, e in enumerate(selected)
+            ]
+        recovery = sum(_recovery_score(e) for e in selected) / len(selected) if selected else 0.0
+        return LiquidatableResponse(
+            selected_positions=[e.position_id for e in selected],
+            strategy=strategy,
+            estimated_recovery=round(recovery, 4),
+            gas_used=gas_used,
+            constraint_violation=violation,
+            frontier_size=end,
+            book_size=book_size,
+            simulation_time=round((time.perf_counter() - t0) * 1000, 2),
+            budget_exhausted=deadline.hit,
+            proven_optimal=violation is None and len(selected) == min(q.k, end),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "book_size": len(self._entries),
+                "liquidatable": self._frontier_end(1.0),
+                "priced_tokens": len(self._prices),
+            }
+
+
+_store: Optional[PositionStore] = None
+
+
+def get_position_store() -> PositionStore:
+    global _store
+    if _store is None:
+        _store = PositionStore()
+    return _store
+
+
+async def solve_position_update(update: PositionBookUpdate) -> PositionBookResponse:
+    return get_position_store().apply(update)
+
+
+async def solve_liquidatable(q: LiquidatableQuery) -> LiquidatableResponse:
+    return get_position_store().liquidatable(q)
@@ -4,17 +4,23 @@ Quantum simulation service using classical simulators (QUBO + simulated annealin
 Three modules (see README "Functions and Algorithms" for full description):
 
 1. Arbitrage Pathfinder: best swap path across pools (graph + AMM formula + optional neal).
-2. Transaction Scheduler: assign orders to slots to avoid conflicts (conflict matrix + greedy graph coloring).
+2. Transaction Scheduler: assign orders to slots to avoid conflicts (conflict matrix + greedy graph coloring,
+   optionally shrunk by multi-start annealing on the k-coloring BQM).
 3. Liquidation Optimizer: select positions to liquidate (sort by health factor, take top K).
 
 Proof-of-concept: same interface as future real quantum backend.
 """
 
+import os
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Generator, Iterable, Iterator, Optional
+
+import numpy as np
 
 from models.quantum import (
     ArbitrageRequest,
+    ArbitrageColumnarRequest,
     ArbitrageResponse,
     ArbitrageComparison,
     TransactionRef,
@@ -25,142 +31,266 @@ from models.quantum import (
     LiquidationResponse,
     LiquidationComparison,
 )
+from core.config import settings
+from services.budget import Deadline
 from services.demo_pools import get_extended_demo_pools
+from services.path_cache import iter_candidate_paths
+from services.pool_table import PoolTable
+from services.split_router import split_order, top_k_paths
+
+ANNEALING_READS = 100
+DEFAULT_ORDER_GAS = 150_000  # scheduler gas per order without gas_estimate
+
+# Simulated annealing sampler, created once (construction and first sample are the slow part).
+_sampler = None
+_anneal_executor: Optional[ThreadPoolExecutor] = None  # scheduler annealing restarts
+
+
+def _get_sampler():
+    global _sampler
+    if _sampler is None:
+        try:
+            import neal
+            _sampler = neal.SimulatedAnnealingSampler()
+        except Exception:
+            _sampler = False
+    return _sampler if _sampler else None
+
+
+def _anneal_path_qubo(num_vars: int) -> None:
+    """Illustrative path-selection QUBO solved with simulated annealing (result not used by the PoC path)."""
+    sampler = _get_sampler()
+    if not sampler or num_vars <= 0:
+        return
+    try:
+        import dimod
+        bqm = dimod.AdjVectorBQM(dimod.BINARY)
+        for i in range(num_vars):
+            bqm.linear[i] = 0.1
+        sampler.sample(bqm, num_reads=ANNEALING_READS)
+    except Exception:
+        pass
+
 
+def _build_pool_graph(table: PoolTable):
+    """Directed token graph, one edge per swap direction (nodes are the table's int token ids).
 
-def _arbitrage_qubo_classical(pools: list, token_in: str, token_out: str, amount_in: float) -> tuple[list[str], float, float]:
-    """Classical pathfinding: best path and profit. Used as baseline and for 'quantum' result in PoC."""
+    Parallel pools on the same pair are kept together on the edge as
+    "pools": [(address, reserve_in, reserve_out, fee_multiplier), ...], so G[u][v] doubles as the
+    O(1) token-pair -> pools index and routing can pick the best pool per hop.
+    """
     import networkx as nx
 
     G = nx.DiGraph()
-    for p in pools:
-        t0, t1 = p["tokens"][0], p["tokens"][1]
-        r0, r1 = p["reserves"][0], p["reserves"][1]
-        fee = 1 - (p.get("fee", 300) / 10000)
-        # swap t0 -> t1: amount_out = (amount_in * r1 * fee) / (r0 + amount_in * fee)
-        def out_a_b(a, r_a, r_b, f):
-            return (a * r_b * f) / (r_a + a * f) if r_a and (r_a + a * f) else 0
-        G.add_edge(t0, t1, pool=p["address"], reserve_in=r0, reserve_out=r1, fee=fee)
-        G.add_edge(t1, t0, pool=p["address"], reserve_in=r1, reserve_out=r0, fee=fee)
+    for address, t0, t1, r0, r1, fee_bps in table.id_rows():
+        fee = 1 - (fee_bps / 10000)
+        for u, v, hop in ((t0, t1, (address, r0, r1, fee)), (t1, t0, (address, r1, r0, fee))):
+            if G.has_edge(u, v):
+                G[u][v]["pools"].append(hop)
+            else:
+                G.add_edge(u, v, pools=[hop])
+    return G
+
+
+def _best_hop(hops: list, amount: float) -> tuple[float, Optional[str]]:
+    """Best parallel pool for swapping `amount` along one edge: (amount_out, pool address)."""
+    best_out, best_pool = 0.0, None
+    for address, r_in, r_out, fee in hops:
+        # constant product: amount_out = (amount_in * r_out * fee) / (r_in + amount_in * fee)
+        denom = r_in + amount * fee
+        if denom <= 0:
+            continue
+        out = (amount * r_out * fee) / denom
+        if out > best_out:
+            best_out, best_pool = out, address
+    return best_out, best_pool
 
-    try:
-        paths = list(nx.all_simple_paths(G, token_in, token_out, cutoff=5))
-    except (nx.NodeNotFound, nx.NetworkXNoPath):
-        return [token_in, token_out], 0.0, 0.0
 
-    best_path = [token_in]
-    best_profit = 0.0
-    best_amount_out = 0.0
+def _swap_path_out(G, path: list[int], amount_in: float) -> float:
+    """Output of pushing amount_in along path, using the best parallel pool at each hop."""
+    amt = amount_in
+    for i in range(len(path) - 1):
+        amt, _ = _best_hop(G[path[i]][path[i + 1]]["pools"], amt)
+        if amt <= 0:
+            return 0.0
+    return amt
 
-    for path in paths:
-        if len(path) < 2:
-            continue
-        amt = amount_in
-        for i in range(len(path) - 1):
-            u, v = path[i], path[i + 1]
-            edge = G[u][v]
-            amt = (amt * edge["reserve_out"] * edge["fee"]) / (edge["reserve_in"] + amt * edge["fee"])
+
+def _iter_path_improvements(
+    G, token_in: int, token_out: int, amount_in: float, max_hops: int, deadline: Optional[Deadline] = None
+) -> Generator[tuple[list[int], float], None, tuple[int, bool]]:
+    """Score simple paths lazily, yielding (path, amount_out) each time a better path is found.
+
+    Returns (paths_evaluated, complete) when exhausted; complete=False if the deadline cut the search.
+    """
+    best_amount_out = 0.0
+    paths_evaluated = 0
+    for path in iter_candidate_paths(G, token_in, token_out, max_hops, deadline):
+        if deadline is not None and deadline.expired():
+            return paths_evaluated, False
+        paths_evaluated += 1
+        amt = _swap_path_out(G, path, amount_in)
         if amt > best_amount_out:
             best_amount_out = amt
-            best_path = path
+            yield path, amt
+    return paths_evaluated, not (deadline is not None and deadline.hit)
 
-    # "Profit" vs direct swap if exists
-    direct_out = 0.0
-    if G.has_edge(token_in, token_out):
-        e = G[token_in][token_out]
-        direct_out = (amount_in * e["reserve_out"] * e["fee"]) / (e["reserve_in"] + amount_in * e["fee"])
-    profit = best_amount_out - direct_out if direct_out else best_amount_out
 
-    return best_path, float(profit), float(best_amount_out)
+def _direct_swap_out(G, token_in: int, token_out: int, amount_in: float) -> float:
+    if not G.has_edge(token_in, token_out):
+        return 0.0
+    return _best_hop(G[token_in][token_out]["pools"], amount_in)[0]
+
+
+def _arbitrage_qubo_classical(
+    G,
+    token_in: int,
+    token_out: int,
+    amount_in: float,
+    max_hops: int = 5,
+    deadline: Optional[Deadline] = None,
+) -> tuple[list[int], float, float, int, bool]:
+    """Classical pathfinding: best path and profit. Used as baseline and for 'quantum' result in PoC.
+
+    Anytime: stops enumerating when the deadline expires. Returns
+    (path, profit, amount_out, paths_evaluated, complete); complete=True means every simple path
+    up to max_hops was scored, i.e. the path is optimal for that hop limit.
+    """
+    if token_in not in G or token_out not in G:
+        return [token_in, token_out], 0.0, 0.0, 0, True
 
+    best_path = [token_in]
+    best_amount_out = 0.0
+    search = _iter_path_improvements(G, token_in, token_out, amount_in, max_hops, deadline)
+    while True:
+        try:
+            best_path, best_amount_out = next(search)
+        except StopIteration as done:
+            paths_evaluated, complete = done.value
+            break
+
+    # "Profit" vs direct swap if exists
+    direct_out = _direct_swap_out(G, token_in, token_out, amount_in)
+    profit = best_amount_out - direct_out if direct_out else best_amount_out
 
-def _arbitrage_classical_baseline(pools: list, token_in: str, token_out: str, amount_in: float) -> tuple[list[str], float, float]:
+    return best_path, float(profit), float(best_amount_out), paths_evaluated, complete
+
+
+def _best_cycle(
+    G, token: int, amount_in: float, max_hops: int, deadline: Optional[Deadline] = None
+) -> tuple[list[int], float]:
+    """Best cycle token -> ... -> token of up to max_hops swaps: (cycle, amount_out). Profit = amount_out - amount_in."""
+    best_cycle, best_out = [token], 0.0
+    if token not in G:
+        return best_cycle, best_out
+    for first in G.successors(token):
+        for path in iter_candidate_paths(G, first, token, max_hops - 1, deadline):
+            if deadline is not None and deadline.expired():
+                return best_cycle, best_out
+            cycle = [token] + path
+            amt = _swap_path_out(G, cycle, amount_in)
+            if amt > best_out:
+                best_cycle, best_out = cycle, amt
+    return best_cycle, best_out
+
+
+def _path_transactions(G, path: list[int], amount_in: float) -> list[TransactionRef]:
+    """One swap per hop through the pool chosen for the running amount (edge lookup, no pool scan)."""
+    transactions = []
+    amt = amount_in
+    for i in range(len(path) - 1):
+        if not G.has_edge(path[i], path[i + 1]):
+            break
+        amt, pool = _best_hop(G[path[i]][path[i + 1]]["pools"], amt)
+        if pool is None:
+            break
+        transactions.append(TransactionRef(pool=pool, action="swap", amount=amount_in if i == 0 else 0))
+    return transactions
+
+
+def _arbitrage_classical_baseline(
+    G, token_in: int, token_out: int, amount_in: float, deadline: Optional[Deadline] = None
+) -> tuple[list[int], float, float]:
     """Classical baseline: only direct swap or 2-hop paths (greedy local optimum; no 3+ hop search)."""
-    import networkx as nx
-    G = nx.DiGraph()
-    for p in pools:
-        t0, t1 = p["tokens"][0], p["tokens"][1]
-        r0, r1 = p["reserves"][0], p["reserves"][1]
-        fee = 1 - (p.get("fee", 300) / 10000)
-        G.add_edge(t0, t1, pool=p["address"], reserve_in=r0, reserve_out=r1, fee=fee)
-        G.add_edge(t1, t0, pool=p["address"], reserve_in=r1, reserve_out=r0, fee=fee)
     # Classical: only direct or 2-hop (max path length = 3 nodes) — local optimum
-    if G.has_edge(token_in, token_out):
-        e = G[token_in][token_out]
-        direct_out = (amount_in * e["reserve_out"] * e["fee"]) / (e["reserve_in"] + amount_in * e["fee"])
-        direct_out = float(direct_out)
-        # Still consider 2-hop; take best of direct vs best 2-hop
-        best_out = direct_out
-        best_path = [token_in, token_out]
-    else:
-        best_out = 0.0
-        best_path = [token_in, token_out]
-    try:
-        paths_2hop = list(nx.all_simple_paths(G, token_in, token_out, cutoff=2))
-    except (nx.NodeNotFound, nx.NetworkXNoPath):
-        paths_2hop = []
-    for path in paths_2hop:
-        if len(path) < 2:
-            continue
-        amt = amount_in
-        for i in range(len(path) - 1):
-            u, v = path[i], path[i + 1]
-            edge = G[u][v]
-            amt = (amt * edge["reserve_out"] * edge["fee"]) / (edge["reserve_in"] + amt * edge["fee"])
-            if amt <= 0:
-                break
+    # Still consider 2-hop; take best of direct vs best 2-hop
+    direct_out = float(_direct_swap_out(G, token_in, token_out, amount_in))
+    best_out = direct_out
+    best_path = [token_in, token_out]
+    for path in iter_candidate_paths(G, token_in, token_out, 2, deadline):
+        if deadline is not None and deadline.expired():
+            break
+        amt = _swap_path_out(G, path, amount_in)
         if amt > best_out:
             best_out = amt
             best_path = path
-    direct_out = 0.0
-    if G.has_edge(token_in, token_out):
-        e = G[token_in][token_out]
-        direct_out = (amount_in * e["reserve_out"] * e["fee"]) / (e["reserve_in"] + amount_in * e["fee"])
     profit = best_out - direct_out if direct_out else best_out
     return best_path, float(profit), float(best_out)
 
 
 async def solve_arbitrage(req: ArbitrageRequest) -> ArbitrageResponse:
     """Arbitrage: compare classical (greedy 2-hop = local optimum) vs quantum (full path = global optimum)."""
-    if req.use_extended_demo:
-        pools = get_extended_demo_pools()
-    else:
-        pools = [p.model_dump() for p in req.pools]
+    table = PoolTable.from_pools(get_extended_demo_pools() if req.use_extended_demo else req.pools)
+    return _solve_arbitrage_table(
+        table, req.token_in, req.token_out, req.amount_in, req.max_hops, req.time_budget_ms, req.split_paths
+    )
+
+
+async def solve_arbitrage_columnar(req: ArbitrageColumnarRequest) -> ArbitrageResponse:
+    """Arbitrage fast path: pools given as parallel arrays, no per-pool model validation or dump."""
+    table = PoolTable.from_columns(req.tokens, req.addresses, req.token_pairs, req.reserves, req.fees)
+    return _solve_arbitrage_table(
+        table, req.token_in, req.token_out, req.amount_in, req.max_hops, req.time_budget_ms, req.split_paths
+    )
+
+
+def _solve_arbitrage_table(
+    table: PoolTable,
+    token_in: str,
+    token_out: str,
+    amount_in: float,
+    max_hops: int,
+    time_budget_ms: Optional[int],
+    split_paths: int = 1,
+) -> ArbitrageResponse:
+    deadline = Deadline.from_request(time_budget_ms)
+    max_hops = min(5, max_hops)
+    queried = (token_in, token_out)
+    token_in, token_out = table.node(token_in), table.node(token_out)
+    G = _build_pool_graph(table)
+
+    # Quantum: full path search (all simple paths up to max_hops), best-so-far if the budget runs out.
+    # It runs first so the returned path gets the whole budget; the baseline only gets what is left.
+    t_quantum = time.perf_counter()
+    path, profit, quantum_amount_out, paths_evaluated, search_complete = _arbitrage_qubo_classical(
+        G, token_in, token_out, amount_in, max_hops, deadline
+    )
+    annealing_reads = 0
+    if not settings.lean_mode and not deadline.expired():
+        _anneal_path_qubo(min(10, len(path) * 2))
+        annealing_reads = ANNEALING_READS
+    quantum_time_ms = (time.perf_counter() - t_quantum) * 1000
 
     # Classical: direct or first 2-hop only
     t_classical = time.perf_counter()
     classical_path, classical_profit, classical_amount_out = _arbitrage_classical_baseline(
-        pools, req.token_in, req.token_out, req.amount_in
+        G, token_in, token_out, amount_in, deadline.remainder()
     )
     classical_time_ms = (time.perf_counter() - t_classical) * 1000
 
-    # Quantum: full path search (all simple paths up to max_hops)
-    t_quantum = time.perf_counter()
-    path, profit, quantum_amount_out = _arbitrage_qubo_classical(
-        pools, req.token_in, req.token_out, req.amount_in
-    )
-    paths_evaluated = 0
-    try:
-        import networkx as nx
-        G = nx.DiGraph()
-        for p in pools:
-            t0, t1 = p["tokens"][0], p["tokens"][1]
-            G.add_edge(t0, t1)
-            G.add_edge(t1, t0)
-        paths_evaluated = len(list(nx.all_simple_paths(G, req.token_in, req.token_out, cutoff=min(5, req.max_hops))))
-    except Exception:
-        pass
-    try:
-        import dimod
-        import neal
-        bqm = dimod.AdjVectorBQM(dimod.BINARY)
-        for i in range(min(10, len(path) * 2)):
-            bqm.linear[i] = 0.1
-        sampler = neal.SimulatedAnnealingSampler()
-        _ = sampler.sample(bqm, num_reads=100)
-    except Exception:
-        pass
-    quantum_time_ms = (time.perf_counter() - t_quantum) * 1000
+    # Split routing: water-fill amount_in over the top-k paths (ranked at amount_in / k)
+    split_routes, split_amount_out = None, None
+    k = min(split_paths, settings.SPLIT_ROUTE_MAX_PATHS)
+    if k > 1 and quantum_amount_out > 0:
+        t_split = time.perf_counter()
+        candidates = top_k_paths(G, token_in, token_out, amount_in / k, max_hops, k, deadline)
+        split_routes, split_amount_out = split_order(
+            G, table.tokens, candidates, amount_in, settings.SPLIT_ROUTE_STEPS, deadline
+        )
+        if split_amount_out < quantum_amount_out:
+            # Chunked allocation can lose to the single best path only by rounding; keep that path whole
+            split_routes, split_amount_out = split_order(G, table.tokens, [path], amount_in, 1)
+        split_time_ms = (time.perf_counter() - t_split) * 1000
 
     # Compare by output amount (apples to apples)
     improvement_pct = 0.0
@@ -168,13 +298,11 @@ async def solve_arbitrage(req: ArbitrageRequest) -> ArbitrageResponse:
         improvement_pct = round((quantum_amount_out - classical_amount_out) / classical_amount_out * 100, 2)
     winner = "quantum" if quantum_amount_out >= classical_amount_out else "classical"
 
-    transactions = []
-    for i in range(len(path) - 1):
-        for p in req.pools:
-            if {path[i], path[i + 1]} == set(p.tokens):
-                transactions.append(TransactionRef(pool=p.address, action="swap", amount=req.amount_in if i == 0 else 0))
-                break
+    transactions = _path_transactions(G, path, amount_in)
+    if not transactions and len(table):
+        transactions = [TransactionRef(pool=table.addresses[0], action="swap", amount=amount_in)]
 
+    classical_path, path = table.names(classical_path, *queried), table.names(path, *queried)
     comparison = ArbitrageComparison(
         classical_path=classical_path,
         classical_profit=round(classical_amount_out, 2),
@@ -185,79 +313,400 @@ async def solve_arbitrage(req: ArbitrageRequest) -> ArbitrageResponse:
         improvement_pct=improvement_pct,
         winner=winner,
     )
-    if not transactions and path and len(path) >= 2 and pools:
-        for i in range(len(path) - 1):
-            for p in pools:
-                if {path[i], path[i + 1]} == set(p["tokens"]):
-                    transactions.append(TransactionRef(pool=p["address"], action="swap", amount=req.amount_in if i == 0 else 0))
-                    break
-    if not transactions and req.pools:
-        transactions = [TransactionRef(pool=req.pools[0].address, action="swap", amount=req.amount_in)]
-
     quantum_metrics = {
         "paths_evaluated": paths_evaluated,
-        "max_hops": min(5, req.max_hops),
+        "max_hops": max_hops,
         "solver_ms": round(quantum_time_ms, 2),
         "qubo_approx_vars": min(10, len(path) * 2),
-        "annealing_reads": 100,
+        "annealing_reads": annealing_reads,
+        "time_budget_ms": deadline.budget_ms,
     }
+    if split_routes is not None:
+        quantum_metrics["split_paths_used"] = len(split_routes)
+        quantum_metrics["split_gain_pct"] = round((split_amount_out - quantum_amount_out) / quantum_amount_out * 100, 4)
+        quantum_metrics["split_ms"] = round(split_time_ms, 2)
     return ArbitrageResponse(
         optimal_path=path,
         expected_profit=round(quantum_amount_out, 2),
-        transactions=transactions or [TransactionRef(pool="0x0", action="swap", amount=req.amount_in)],
+        transactions=transactions or [TransactionRef(pool="0x0", action="swap", amount=amount_in)],
         simulation_time=round(quantum_time_ms, 2),
         classical_baseline=round(classical_profit, 2),
         comparison=comparison,
+        budget_exhausted=deadline.hit,
+        proven_optimal=search_complete,
+        split_routes=split_routes,
+        split_amount_out=round(split_amount_out, 2) if split_amount_out is not None else None,
         quantum_metrics=quantum_metrics,
     )
 
 
-def _build_conflict_matrix(orders: list) -> list[list[int]]:
-    """Build conflict matrix: 1 if two orders share a write."""
+def _build_conflict_matrix(orders: list, deadline: Optional[Deadline] = None) -> tuple[list[list[int]], set[int]]:
+    """Build conflict matrix: 1 if two orders share a write.
+
+    Indexes orders by write key, so only actual conflict pairs are visited (no set intersection
+    per order pair). If the deadline expires, the orders whose keys were not processed yet are
+    returned as `unresolved` (their conflicts are unknown).
+    """
     n = len(orders)
     M = [[0] * n for _ in range(n)]
+    writers: dict[str, list[int]] = {}
     for i in range(n):
-        wi = getattr(orders[i], "writes", None) or []
-        for j in range(i + 1, n):
-            wj = getattr(orders[j], "writes", None) or []
-            if set(wi) & set(wj):
-                M[i][j] = M[j][i] = 1
-    return M
-
-
-def _schedule_orders_classical(orders: list, conflict_matrix: list[list[int]]) -> dict[str, list[str]]:
-    """Greedy graph coloring to assign orders to slots (minimize conflicts)."""
-    n = len(orders)
-    if n == 0:
-        return {"slot_1": []}
-    # Greedy coloring
+        for key in set(getattr(orders[i], "writes", None) or []):
+            writers.setdefault(key, []).append(i)
+    keys = list(writers)
+    for k, key in enumerate(keys):
+        if deadline is not None and deadline.expired():
+            unresolved = {i for rest in keys[k:] for i in writers[rest]}
+            return M, unresolved
+        idx = writers[key]
+        for a in range(len(idx)):
+            row = M[idx[a]]
+            for b in range(a + 1, len(idx)):
+                row[idx[b]] = M[idx[b]][idx[a]] = 1
+    return M, set()
+
+
+def _slot_lower_bound(orders: list, conflict_matrix: list[list[int]], from_writes: bool) -> int:
+    """Lower bound on slots: orders sharing one write key form a clique (else 2 if any conflict)."""
+    if not orders:
+        return 1
+    if from_writes:
+        counts: dict[str, int] = {}
+        for o in orders:
+            for key in set(getattr(o, "writes", None) or []):
+                counts[key] = counts.get(key, 0) + 1
+        return max([1, *counts.values()])
+    return 2 if any(any(row) for row in conflict_matrix) else 1
+
+
+def _iter_greedy_coloring(
+    n: int,
+    neighbor_colors: Callable[[int, list[int]], set[int]],
+    deadline: Optional[Deadline] = None,
+    unresolved: Optional[set[int]] = None,
+) -> Iterator[tuple[int, int]]:
+    """Greedy coloring in order, yielding (order_index, color) as each order is placed.
+
+    neighbor_colors(u, color) returns the colors already taken by orders conflicting with u.
+    Anytime: once the deadline expires, and for orders with unresolved conflicts, each remaining
+    order gets its own fresh color after all greedy ones (sequential execution is always conflict-free).
+    """
+    unresolved = unresolved or set()
     color = [-1] * n
+    top = -1
     for u in range(n):
-        used = set()
-        for v in range(n):
-            if conflict_matrix[u][v] == 1 and color[v] != -1:
-                used.add(color[v])
+        if u in unresolved:
+            continue
+        if deadline is not None and deadline.expired():
+            break
+        used = neighbor_colors(u, color)
         c = 0
         while c in used:
             c += 1
         color[u] = c
-    slots: dict[str, list[str]] = {}
+        top = max(top, c)
+        yield u, c
     for u in range(n):
-        slot_id = f"slot_{color[u] + 1}"
-        if slot_id not in slots:
-            slots[slot_id] = []
+        if color[u] == -1:
+            top += 1
+            color[u] = top
+            yield u, top
+
+
+def _matrix_neighbor_colors(conflict_matrix: list[list[int]]) -> Callable[[int, list[int]], set[int]]:
+    return lambda u, color: {color[v] for v, x in enumerate(conflict_matrix[u]) if x == 1 and color[v] != -1}
+
+
+def _iter_coloring_by_writes(orders: list, deadline: Optional[Deadline] = None) -> Iterator[tuple[int, int]]:
+    """Same greedy coloring as the conflict-matrix path, driven by a write-key -> colors index.
+
+    Memory is O(orders + write keys) instead of O(orders²), for streaming large order sets.
+    """
+    key_colors: dict[str, set[int]] = {}
+    writes = [set(getattr(o, "writes", None) or []) for o in orders]
+
+    def neighbor_colors(u: int, color: list[int]) -> set[int]:
+        used: set[int] = set()
+        for key in writes[u]:
+            used |= key_colors.get(key, set())
+        return used
+
+    for u, c in _iter_greedy_coloring(len(orders), neighbor_colors, deadline):
+        for key in writes[u]:
+            key_colors.setdefault(key, set()).add(c)
+        yield u, c
+
+
+def _schedule_from_assignments(orders: list, assignments: Iterable[tuple[int, int]]) -> dict[str, list[str]]:
+    """slot_id -> order ids from (order_index, color) pairs; slots are numbered by first appearance."""
+    slot_of: dict[int, str] = {}
+    slots: dict[str, list[str]] = {}
+    for u, c in assignments:
+        slot_id = slot_of.setdefault(c, f"slot_{len(slot_of) + 1}")
         order_id = getattr(orders[u], "id", None) or f"order_{u + 1}"
-        slots[slot_id].append(order_id)
+        slots.setdefault(slot_id, []).append(order_id)
     return slots
 
 
+def _slot_gas(assignments: Iterable[tuple[int, int]], gas: list[int]) -> dict[str, int]:
+    """slot_id -> total gas of its orders, slots numbered like _schedule_from_assignments (by index, so repeated ids stay apart)."""
+    slot_of: dict[int, str] = {}
+    totals: dict[str, int] = {}
+    for u, c in assignments:
+        slot_id = slot_of.setdefault(c, f"slot_{len(slot_of) + 1}")
+        totals[slot_id] = totals.get(slot_id, 0) + gas[u]
+    return totals
+
+
+def _schedule_orders_classical(
+    orders: list,
+    conflict_matrix: list[list[int]],
+    deadline: Optional[Deadline] = None,
+    unresolved: Optional[set[int]] = None,
+) -> dict[str, list[str]]:
+    """Greedy graph coloring to assign orders to slots (minimize conflicts)."""
+    n = len(orders)
+    if n == 0:
+        return {"slot_1": []}
+    return _schedule_from_assignments(
+        orders, _iter_greedy_coloring(n, _matrix_neighbor_colors(conflict_matrix), deadline, unresolved)
+    )
+
+
+def _anneal_threads() -> int:
+    return max(1, settings.SCHEDULER_ANNEAL_THREADS or os.cpu_count() or 1)
+
+
+def _get_anneal_executor() -> ThreadPoolExecutor:
+    """Threads for parallel restarts (the neal sampling loop releases the GIL)."""
+    global _anneal_executor
+    if _anneal_executor is None:
+        _anneal_executor = ThreadPoolExecutor(
+            max_workers=_anneal_threads(),
+            thread_name_prefix="anneal",
+        )
+    return _anneal_executor
+
+
+def _coloring_bqm(m: int, edges: np.ndarray, k: int):
+    """k-coloring BQM over x[v*k + c]: one-hot (1 - sum_c x_vc)^2 per order plus x_uc * x_vc per conflict
+    edge and color. Energy is 0 exactly for proper colorings."""
+    import dimod
+
+    var = np.arange(m * k).reshape(m, k)
+    a, b = np.triu_indices(k, 1)
+    onehot_rows, onehot_cols = var[:, a].ravel(), var[:, b].ravel()
+    conflict_rows, conflict_cols = var[edges[:, 0]].ravel(), var[edges[:, 1]].ravel()
+    rows = np.concatenate([onehot_rows, conflict_rows])
+    cols = np.concatenate([onehot_cols, conflict_cols])
+    quad = np.concatenate([np.full(len(onehot_rows), 2.0), np.ones(len(conflict_rows))])
+    return dimod.BQM.from_numpy_vectors(np.full(m * k, -1.0), (rows, cols, quad), float(m), "BINARY")
+
+
+def _anneal_coloring(
+    conflict_matrix: list[list[int]], slots: int, lower_bound: int, deadline: Deadline, restarts: int
+) -> tuple[Optional[list[int]], dict]:
+    """Shrink the greedy slot count with simulated annealing on the k-coloring BQM.
+
+    For k = slots-1, slots-2, ... every restart (own seed, started from the best coloring so far
+    with its top color folded into the others) runs on the anneal threads; the first zero-energy
+    sample becomes the new best. Stops at the lower bound, when no restart finds a proper
+    coloring, or when the deadline expires. Returns (colors or None if not improved, metrics).
+    """
+    t0 = time.perf_counter()
+    threads = min(restarts, _anneal_threads())
+    metrics: dict = {"sampler": "neal", "restarts": restarts, "threads": threads, "greedy_slots": slots, "k_tried": []}
+    sampler = _get_sampler()
+    if not sampler:
+        metrics["sampler"] = "unavailable"
+        return None, metrics
+    M = np.asarray(conflict_matrix, dtype=np.int8)
+    pairs = np.argwhere(np.triu(M, 1))
+    active = np.flatnonzero(M.any(axis=1))  # isolated orders go to color 0, which the active ones always use
+    remap = np.full(len(M), -1)
+    remap[active] = np.arange(len(active))
+    edges = remap[pairs]
+    m = len(active)
+    neighbors = [[] for _ in range(m)]
+    for u, v in edges.tolist():
+        neighbors[u].append(v)
+        neighbors[v].append(u)
+
+    color = [-1] * m
+    for u, c in _iter_greedy_coloring(m, lambda u, col: {col[v] for v in neighbors[u] if col[v] != -1}):
+        color[u] = c
+    best, improved = np.array(color), False
+    executor = _get_anneal_executor()
+    k = len(np.unique(best)) - 1
+    while k >= max(lower_bound, 1) and not deadline.expired():
+        # Start: best coloring with colors >= k moved to the least-conflicting color < k
+        start = best.copy()
+        for u in np.flatnonzero(start >= k).tolist():
+            counts = np.bincount([start[v] for v in neighbors[u] if start[v] < k], minlength=k)
+            start[u] = int(np.argmin(counts))
+        initial = np.zeros((m, k), dtype=np.int8)
+        initial[np.arange(m), start] = 1
+        bqm = _coloring_bqm(m, edges, k)
+        chunks = [restarts // threads + (i < restarts % threads) for i in range(threads)]
+        futures = [
+            executor.submit(
+                sampler.sample, bqm,
+                num_reads=reads, num_sweeps=settings.SCHEDULER_ANNEAL_SWEEPS, seed=k * 1000 + i,
+                initial_states=(np.tile(initial.ravel(), (reads, 1)), list(range(m * k))),
+                interrupt_function=deadline.expired,
+            )
+            for i, reads in enumerate(chunks) if reads
+        ]
+        found = None
+        for f in futures:
+            record = f.result().record
+            hits = np.flatnonzero(record.energy < 0.5)
+            if found is None and len(hits):
+                found = record.sample[hits[0]].reshape(m, k).argmax(axis=1)
+        metrics["k_tried"].append(k)
+        if found is None:
+            break
+        # Renumber to 0..used-1: a sample may leave colors unused (color 0 included)
+        best, improved = np.unique(found, return_inverse=True)[1].ravel(), True
+        k = len(np.unique(best)) - 1
+    metrics["slots"] = len(np.unique(best)) if m else 1
+    metrics["anneal_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    if not improved:
+        return None, metrics
+    colors = [0] * len(M)
+    for u, c in zip(active.tolist(), best.tolist()):
+        colors[u] = c
+    return colors, metrics
+
+
+def _order_gas(o) -> int:
+    gas = getattr(o, "gas_estimate", None)
+    return DEFAULT_ORDER_GAS if gas is None else gas
+
+
+def _pack_slots(
+    conflict_matrix: list[list[int]],
+    colors: list[int],
+    gas: list[int],
+    cap: int,
+    unresolved: set[int],
+    deadline: Optional[Deadline] = None,
+) -> tuple[list[list[int]], dict]:
+    """Conflict-free slots that also fit `cap` gas each: fewest slots first, then balanced loads.
+
+    Two constructions, keeping the one with fewer slots: first-fit decreasing by gas over all
+    orders (a slot takes an order when it has room and no conflicting member), and first-fit
+    decreasing inside each color class of `colors`. Then, while the deadline allows, the lightest
+    slot is emptied into the others when all its orders fit elsewhere, and orders move from
+    heavier to lighter slots while that narrows the gap. An order above the cap gets a slot of its own;
+    unresolved orders (conflicts unknown) keep their own slots.
+    """
+    n = len(gas)
+    M = np.asarray(conflict_matrix, dtype=bool).reshape(n, n)
+    neighbors = [set(np.flatnonzero(M[u]).tolist()) for u in range(n)]
+    resolved = [u for u in range(n) if u not in unresolved]
+    by_gas = sorted(resolved, key=lambda u: (-gas[u], -len(neighbors[u])))
+
+    def first_fit(order: list[int], slots: list[set[int]], loads: list[int]) -> None:
+        for u in order:
+            for i, members in enumerate(slots):
+                if loads[i] + gas[u] <= cap and not neighbors[u] & members:
+                    members.add(u)
+                    loads[i] += gas[u]
+                    break
+            else:
+                slots.append({u})
+                loads.append(gas[u])
+
+    slots: list[set[int]] = []
+    loads: list[int] = []
+    first_fit(by_gas, slots, loads)
+    by_color: list[set[int]] = []
+    color_loads: list[int] = []
+    for c in sorted({colors[u] for u in resolved}):
+        class_slots: list[set[int]] = []
+        class_loads: list[int] = []
+        first_fit([u for u in by_gas if colors[u] == c], class_slots, class_loads)
+        by_color += class_slots
+        color_loads += class_loads
+    if len(by_color) < len(slots):
+        slots, loads = by_color, color_loads
+    constructed = len(slots)
+
+    def fits(u: int, i: int) -> bool:
+        return loads[i] + gas[u] <= cap and not neighbors[u] & slots[i]
+
+    # Fewer slots: empty the lightest slot into the others (least-loaded slot that fits first)
+    for victim in sorted(range(len(slots)), key=lambda i: loads[i]):
+        if deadline is not None and deadline.expired():
+            break
+        moves = []
+        for u in sorted(slots[victim], key=lambda u: -gas[u]):
+            targets = [i for i in range(len(slots)) if i != victim and slots[i] and fits(u, i)]
+            if not targets:
+                break
+            i = min(targets, key=lambda i: loads[i])
+            slots[i].add(u)
+            loads[i] += gas[u]
+            moves.append((u, i))
+        else:
+            slots[victim], loads[victim] = set(), 0
+            continue
+        for u, i in moves:  # undo: this slot stays
+            slots[i].discard(u)
+            loads[i] -= gas[u]
+    kept = [i for i in range(len(slots)) if slots[i]]
+    slots, loads = [slots[i] for i in kept], [loads[i] for i in kept]
+
+    # Balance: move an order from a heavier to a lighter slot while that narrows their gap
+    # (each move lowers the sum of squared loads, so this terminates)
+    for _ in range(4 * n):
+        if deadline is not None and deadline.expired():
+            break
+        by_load = sorted(range(len(slots)), key=lambda i: loads[i])
+        move = next(
+            (
+                (u, src, dst)
+                for src in reversed(by_load)
+                for u in sorted(slots[src], key=lambda u: gas[u])
+                for dst in by_load
+                if loads[dst] + gas[u] < loads[src] and len(slots[src]) > 1 and fits(u, dst)
+            ),
+            None,
+        )
+        if move is None:
+            break
+        u, src, dst = move
+        slots[src].discard(u)
+        loads[src] -= gas[u]
+        slots[dst].add(u)
+        loads[dst] += gas[u]
+
+    ordered = [sorted(members) for members in slots] + [[u] for u in sorted(unresolved)]
+    all_loads = loads + [gas[u] for u in sorted(unresolved)]
+    total = sum(gas)
+    metrics = {
+        "max_gas_per_slot": cap,
+        "constructed_slots": constructed + len(unresolved),
+        "slots": len(ordered),
+        "gas_lower_bound": -(-total // cap),
+        "oversized_orders": sum(g > cap for g in gas),
+        "mean_utilization": round(total / (len(ordered) * cap), 4),
+        "min_utilization": round(min(all_loads) / cap, 4),
+        "max_utilization": round(max(all_loads) / cap, 4),
+    }
+    return ordered, metrics
+
+
 async def solve_scheduler(req: SchedulerRequest) -> SchedulerResponse:
     """Scheduler: compare classical (sequential = 1 order per slot) vs quantum (graph coloring = fewer slots)."""
+    deadline = Deadline.from_request(req.time_budget_ms)
     orders = req.pending_orders
+    unresolved: set[int] = set()
     if req.conflict_matrix is not None:
         conflict_matrix = req.conflict_matrix
     else:
-        conflict_matrix = _build_conflict_matrix(orders)
+        conflict_matrix, unresolved = _build_conflict_matrix(orders, deadline)
     n = len(orders)
     total_conflicts = sum(sum(row) for row in conflict_matrix) // 2
 
@@ -266,9 +715,37 @@ async def solve_scheduler(req: SchedulerRequest) -> SchedulerResponse:
     classical_conflicts_remaining = 0
 
     # Quantum: graph coloring = batch non-conflicting orders, fewer slots
-    schedule = _schedule_orders_classical(orders, conflict_matrix)
+    colors = [0] * n
+    for u, c in _iter_greedy_coloring(n, _matrix_neighbor_colors(conflict_matrix), deadline, unresolved):
+        colors[u] = c
+    assignment = list(enumerate(colors))
+    schedule = _schedule_from_assignments(orders, assignment) if n else {"slot_1": []}
     quantum_slots = len(schedule)
     quantum_conflicts_remaining = 0
+    lower_bound = _slot_lower_bound(orders, conflict_matrix, from_writes=req.conflict_matrix is None)
+
+    annealing = None
+    if req.annealing and not unresolved and quantum_slots > lower_bound:
+        restarts = max(1, req.annealing_restarts or settings.SCHEDULER_ANNEAL_RESTARTS)
+        annealed, annealing = _anneal_coloring(conflict_matrix, quantum_slots, lower_bound, deadline, restarts)
+        if annealed is not None:
+            colors = annealed
+            assignment = list(enumerate(colors))
+            schedule = _schedule_from_assignments(orders, assignment)
+            quantum_slots = len(schedule)
+
+    packing = None
+    gas = [_order_gas(o) for o in orders]
+    if req.max_gas_per_slot and n:
+        slots, packing = _pack_slots(conflict_matrix, colors, gas, req.max_gas_per_slot, unresolved, deadline)
+        assignment = [(u, i) for i, slot in enumerate(slots) for u in slot]
+        schedule = _schedule_from_assignments(orders, assignment)
+        quantum_slots = len(schedule)
+        lower_bound = max(lower_bound, packing["gas_lower_bound"])
+    slot_gas = None
+    if req.max_gas_per_slot or any(o.gas_estimate for o in orders):
+        totals = _slot_gas(assignment, gas)
+        slot_gas = {slot_id: totals.get(slot_id, 0) for slot_id in schedule}
 
     slots_reduction_pct = round((classical_slots - quantum_slots) / max(classical_slots, 1) * 100, 2) if classical_slots else 0
     winner = "quantum" if quantum_slots < classical_slots else "classical"
@@ -288,7 +765,14 @@ async def solve_scheduler(req: SchedulerRequest) -> SchedulerResponse:
         "conflict_pairs": total_conflicts,
         "coloring_slots": quantum_slots,
         "classical_slots_baseline": classical_slots,
+        "slots_lower_bound": lower_bound,
+        "unresolved_orders": len(unresolved),
+        "time_budget_ms": deadline.budget_ms,
     }
+    if annealing is not None:
+        quantum_metrics["annealing"] = annealing
+    if packing is not None:
+        quantum_metrics["packing"] = packing
     return SchedulerResponse(
         schedule=schedule,
         total_slots=quantum_slots,
@@ -296,6 +780,12 @@ async def solve_scheduler(req: SchedulerRequest) -> SchedulerResponse:
         conflict_matrix=conflict_matrix,
         total_conflicts=total_conflicts,
         comparison=comparison,
+        budget_exhausted=deadline.hit,
+        proven_optimal=not unresolved and quantum_slots <= lower_bound,
+        slot_gas=slot_gas,
+        slot_utilization=(
+            {slot_id: round(g / req.max_gas_per_slot, 4) for slot_id, g in slot_gas.items()} if req.max_gas_per_slot else None
+        ),
         quantum_metrics=quantum_metrics,
     )
 
@@ -312,13 +802,21 @@ def _debt_amounts(p) -> dict:
     return getattr(p, "debt_amounts", None) or {}
 
 
-def _select_under_constraints(positions: list, max_gas: int | None, liquidity: dict | None, order_key) -> tuple[list, float, int, str | None]:
-    """Select positions in order given by order_key until gas/liquidity constraints are exceeded. Returns (selected, recovery, gas_used, violation_msg)."""
-    selected: list = []
+def _iter_under_constraints(
+    positions: list, max_gas: int | None, liquidity: dict | None, order_key, deadline: Optional[Deadline] = None
+) -> Generator[object, None, tuple[int, str | None]]:
+    """Yield positions in order given by order_key while they fit gas/liquidity constraints.
+
+    Returns (gas_used, violation_msg) when exhausted. Anytime: if the deadline expires, stops with
+    the selection made so far (feasible by construction).
+    """
     total_gas = 0
     total_debt: dict[str, float] = {}
     violation: str | None = None
     for p in sorted(positions, key=order_key):
+        if deadline is not None and deadline.expired():
+            violation = violation or "time budget exhausted"
+            break
         g = _gas_est(p)
         debts = _debt_amounts(p)
         if max_gas is not None and total_gas + g > max_gas:
@@ -334,10 +832,25 @@ def _select_under_constraints(positions: list, max_gas: int | None, liquidity: d
                     break
         if not fits_liquidity:
             continue
-        selected.append(p)
         total_gas += g
         for token, amt in debts.items():
             total_debt[token] = (total_debt.get(token) or 0) + amt
+        yield p
+    return total_gas, violation
+
+
+def _select_under_constraints(
+    positions: list, max_gas: int | None, liquidity: dict | None, order_key, deadline: Optional[Deadline] = None
+) -> tuple[list, float, int, str | None]:
+    """Select positions in order given by order_key until gas/liquidity constraints are exceeded. Returns (selected, recovery, gas_used, violation_msg)."""
+    selected: list = []
+    picks = _iter_under_constraints(positions, max_gas, liquidity, order_key, deadline)
+    while True:
+        try:
+            selected.append(next(picks))
+        except StopIteration as done:
+            total_gas, violation = done.value
+            break
     recovery = sum(_recovery_score(p) for p in selected) / max(len(selected), 1) if selected else 0.0
     return selected, recovery, total_gas, violation
 
@@ -345,22 +858,24 @@ def _select_under_constraints(positions: list, max_gas: int | None, liquidity: d
 async def solve_liquidation(req: LiquidationRequest) -> LiquidationResponse:
     """Liquidation: classical = sort by health (first-fit under constraints); quantum = maximize recovery under constraints (knapsack-style)."""
     t0 = time.perf_counter()
+    deadline = Deadline.from_request(req.time_budget_ms)
     positions = req.positions_to_liquidate
     max_gas = None
     if req.protocol_constraints and isinstance(req.protocol_constraints, dict):
         max_gas = req.protocol_constraints.get("max_gas_per_block")
     liquidity = req.available_liquidity if isinstance(req.available_liquidity, dict) else None
 
+    # Quantum: sort by recovery score (best first), take in order until constraints full — maximizes recovery in budget.
+    # The returned selection runs first; the classical baseline only gets the budget that is left.
+    quantum_selected_list, quantum_recovery, quantum_gas, quantum_violation = _select_under_constraints(
+        positions, max_gas, liquidity, order_key=lambda p: -_recovery_score(p), deadline=deadline
+    )
+
     # Classical: sort by health (worst first), take in order until constraints full — can underuse budget
     classical_selected_list, classical_recovery, classical_gas, classical_violation = _select_under_constraints(
-        positions, max_gas, liquidity, order_key=lambda p: p.health_factor
+        positions, max_gas, liquidity, order_key=lambda p: p.health_factor, deadline=deadline.remainder()
     )
     classical_selected = [p.position_id for p in classical_selected_list]
-
-    # Quantum: sort by recovery score (best first), take in order until constraints full — maximizes recovery in budget
-    quantum_selected_list, quantum_recovery, quantum_gas, _ = _select_under_constraints(
-        positions, max_gas, liquidity, order_key=lambda p: -_recovery_score(p)
-    )
     selected = [p.position_id for p in quantum_selected_list]
     strategy = [
         {"position": p.position_id, "action": "liquidate", "priority": i + 1}
@@ -389,6 +904,7 @@ async def solve_liquidation(req: LiquidationRequest) -> LiquidationResponse:
         "positions_selected": len(selected),
         "solver_ms": round(elapsed, 2),
         "constraints_checked": "gas,liquidity" if (max_gas or liquidity) else "none",
+        "time_budget_ms": deadline.budget_ms,
     }
     return LiquidationResponse(
         selected_positions=selected,
@@ -396,5 +912,104 @@ async def solve_liquidation(req: LiquidationRequest) -> LiquidationResponse:
         estimated_recovery=round(quantum_recovery, 4),
         simulation_time=round(elapsed, 2),
         comparison=comparison,
+        budget_exhausted=deadline.hit,
+        # Every position fit within the constraints: nothing better exists
+        proven_optimal=quantum_violation is None,
         quantum_metrics=quantum_metrics,
     )
+
+
+# --- Streaming variants: sync generators of (event, payload), run on the solver pool ---
+
+
+def stream_arbitrage(req: ArbitrageRequest) -> Iterator[tuple[str, dict]]:
+    """Emit each improving path as it is found, then a final result (no classical comparison)."""
+    t0 = time.perf_counter()
+    table = PoolTable.from_pools(get_extended_demo_pools() if req.use_extended_demo else req.pools)
+    deadline = Deadline.from_request(req.time_budget_ms)
+    G = _build_pool_graph(table)
+    token_in, token_out = table.node(req.token_in), table.node(req.token_out)
+
+    best_path, best_amount_out = [token_in], 0.0
+    paths_evaluated, complete = 0, True
+    if token_in in G and token_out in G:
+        search = _iter_path_improvements(G, token_in, token_out, req.amount_in, min(5, req.max_hops), deadline)
+        while True:
+            try:
+                best_path, best_amount_out = next(search)
+            except StopIteration as done:
+                paths_evaluated, complete = done.value
+                break
+            yield "path", {"path": table.names(best_path), "amount_out": round(best_amount_out, 6)}
+
+    transactions = _path_transactions(G, best_path, req.amount_in)
+    yield "result", {
+        "optimal_path": table.names(best_path, req.token_in),
+        "expected_profit": round(best_amount_out, 2),
+        "transactions": [t.model_dump() for t in transactions],
+        "paths_evaluated": paths_evaluated,
+        "budget_exhausted": deadline.hit,
+        "proven_optimal": complete,
+        "simulation_time": round((time.perf_counter() - t0) * 1000, 2),
+    }
+
+
+def stream_scheduler(req: SchedulerRequest) -> Iterator[tuple[str, dict]]:
+    """Emit each order's slot as it is colored, then a summary. No O(n²) matrix is built or sent."""
+    t0 = time.perf_counter()
+    deadline = Deadline.from_request(req.time_budget_ms)
+    orders = req.pending_orders
+    if req.conflict_matrix is not None:
+        assignments = _iter_greedy_coloring(len(orders), _matrix_neighbor_colors(req.conflict_matrix), deadline)
+    else:
+        assignments = _iter_coloring_by_writes(orders, deadline)
+
+    total_slots = 0
+    for u, c in assignments:
+        total_slots = max(total_slots, c + 1)
+        order_id = getattr(orders[u], "id", None) or f"order_{u + 1}"
+        yield "slot", {"order_id": order_id, "slot": f"slot_{c + 1}"}
+
+    lower_bound = _slot_lower_bound(orders, req.conflict_matrix or [], from_writes=req.conflict_matrix is None)
+    total_slots = total_slots or 1
+    yield "result", {
+        "total_slots": total_slots,
+        "slots_lower_bound": lower_bound,
+        "budget_exhausted": deadline.hit,
+        "proven_optimal": total_slots <= lower_bound,
+        "simulation_time": round((time.perf_counter() - t0) * 1000, 2),
+    }
+
+
+def stream_liquidation(req: LiquidationRequest) -> Iterator[tuple[str, dict]]:
+    """Emit liquidation picks in priority order (the 'quantum' recovery-first selection), then a summary."""
+    t0 = time.perf_counter()
+    deadline = Deadline.from_request(req.time_budget_ms)
+    max_gas = None
+    if req.protocol_constraints and isinstance(req.protocol_constraints, dict):
+        max_gas = req.protocol_constraints.get("max_gas_per_block")
+    liquidity = req.available_liquidity if isinstance(req.available_liquidity, dict) else None
+
+    picks = _iter_under_constraints(
+        req.positions_to_liquidate, max_gas, liquidity, order_key=lambda p: -_recovery_score(p), deadline=deadline
+    )
+    count, recovery_sum = 0, 0.0
+    while True:
+        try:
+            p = next(picks)
+        except StopIteration as done:
+            gas_used, violation = done.value
+            break
+        count += 1
+        recovery_sum += _recovery_score(p)
+        yield "pick", {"position": p.position_id, "action": "liquidate", "priority": count}
+
+    yield "result", {
+        "positions_selected": count,
+        "estimated_recovery": round(recovery_sum / count, 4) if count else 0.0,
+        "gas_used": gas_used if max_gas else None,
+        "constraint_violation": violation,
+        "budget_exhausted": deadline.hit,
+        "proven_optimal": violation is None,
+        "simulation_time": round((time.perf_counter() - t0) * 1000, 2),
+    }
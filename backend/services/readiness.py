@@ -0,0 +1,67 @@
+"""
+Readiness probe: dependency checks (Redis, Pharos RPC, pool snapshot) refreshed in the background,
+so /api/ready only reads cached results plus the live solver queue depth.
+"""
+
+import asyncio
+import time
+
+from core.config import settings
+from services import redis_client
+from core.logger import logging_stats
+from services.persistence import persistence_stats
+from services.pharos_fetcher import get_pharos_fetcher
+from services.shared_pools import shared_pools_info
+from services.solver_pool import is_overloaded, queue_stats
+from services.warmup import get_warmup_state, is_warm
+
+_probes: dict = {
+    "redis": {"status": "unknown", "latency_ms": None},
+    "rpc": {"reachable": False, "latency_ms": None, "block_number": None, "block_lag": None},
+    "checked_at": None,
+}
+
+
+async def refresh_probes() -> None:
+    """Run all dependency probes once and cache the results."""
+    redis, rpc = await asyncio.gather(redis_client.ping(), get_pharos_fetcher().probe_rpc())
+    _probes["redis"] = redis
+    _probes["rpc"] = rpc
+    _probes["checked_at"] = time.time()
+
+
+async def probe_loop() -> None:
+    """Background task: refresh dependency probes every READINESS_PROBE_INTERVAL_SECONDS."""
+    while True:
+        try:
+            await refresh_probes()
+        except asyncio.CancelledError:
+            break
+        except Exception:
+            pass
+        await asyncio.sleep(settings.READINESS_PROBE_INTERVAL_SECONDS)
+
+
+def readiness_report() -> dict:
+    """Cheap readiness snapshot: cached probes + live queue depth. Redis/RPC are optional (demo fallback)."""
+    reasons = []
+    if not is_warm():
+        reasons.append("solver warm-up in progress")
+    if is_overloaded():
+        reasons.append("solver queue depth above threshold")
+    checked_at = _probes["checked_at"]
+    return {
+        "ready": not reasons,
+        "reasons": reasons,
+        "warmup": get_warmup_state(),
+        "solver_queue": queue_stats(),
+        "pool_snapshot": get_pharos_fetcher().snapshot_info(),
+        "shared_pools": shared_pools_info(),
+        "logging": logging_stats(),
+        "dependencies": {
+            "redis": {**_probes["redis"], **redis_client.redis_stats()},  # live breaker state over the cached probe
+            "rpc": _probes["rpc"],
+            "postgres": persistence_stats(),
+        },
+        "probe_age_seconds": round(time.time() - checked_at, 2) if checked_at else None,
+    }
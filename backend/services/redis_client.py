@@ -0,0 +1,172 @@
+"""
+Redis access: one sized connection pool, a circuit breaker with exponential backoff, and
+pipelined multi-key JSON reads/writes.
+
+Redis stays optional. While it is unreachable the breaker is open and the helpers return None
+without touching the network, so callers fall back (chain fetch / demo data) at no cost; after
+the backoff one trial call is let through, and success closes the breaker again.
+"""
+
+import json
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from core.config import settings
+
+_client = None  # redis.asyncio.Redis on a shared ConnectionPool; False if redis-py is not installed
+
+
+class CircuitBreaker:
+    """closed -> open after `threshold` consecutive failures; open -> half_open after the backoff;
+    a failed half_open trial re-opens with the backoff doubled (capped)."""
+
+    __slots__ = ("threshold", "base_backoff", "max_backoff", "state", "failures", "backoff", "opened_at", "_trial")
+
+    def __init__(self, threshold: int, base_backoff: float, max_backoff: float):
+        self.threshold = max(1, threshold)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = "closed"
+        self.failures = 0
+        self.backoff = base_backoff
+        self.opened_at = 0.0
+        self._trial = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.backoff:
+            self.state = "half_open"
+            self._trial = False
+        if self.state == "half_open" and not self._trial:
+            self._trial = True  # one trial call at a time
+            return True
+        return False
+
+    def abort_trial(self) -> None:
+        """The trial call was cancelled (not a Redis failure): allow another one."""
+        self._trial = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.backoff = self.base_backoff
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open":
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+        elif self.failures < self.threshold:
+            return
+        self.state = "open"
+        self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        retry_in = None
+        if self.state == "open":
+            retry_in = round(max(0.0, self.backoff - (time.monotonic() - self.opened_at)), 2)
+        return {"state": self.state, "consecutive_failures": self.failures, "retry_in_seconds": retry_in}
+
+
+_breaker = CircuitBreaker(
+    settings.REDIS_BREAKER_FAILURES,
+    settings.REDIS_BREAKER_BACKOFF_SECONDS,
+    settings.REDIS_BREAKER_MAX_BACKOFF_SECONDS,
+)
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        try:
+            import redis.asyncio as redis
+
+            pool = redis.ConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            )
+            _client = redis.Redis(connection_pool=pool)
+        except Exception:
+            _client = False
+    return _client if _client else None
+
+
+async def get_redis():
+    """Client if Redis may be tried now (breaker closed or trial due), else None."""
+    client = _get_client()
+    if client is None or not _breaker.allow():
+        return None
+    return client
+
+
+async def _call(op: Callable[[Any], Awaitable[Any]]) -> Optional[Any]:
+    """Run op(client) through the breaker; None if Redis is unavailable or the call failed."""
+    client = await get_redis()
+    if client is None:
+        return None
+    try:
+        result = await op(client)
+    except Exception:
+        _breaker.record_failure()
+        return None
+    except BaseException:
+        _breaker.abort_trial()
+        raise
+    _breaker.record_success()
+    return result
+
+
+def redis_stats() -> dict:
+    return {"installed": _get_client() is not None, "breaker": _breaker.snapshot()}
+
+
+async def ping() -> dict:
+    """Readiness probe: status and round-trip latency."""
+    if _get_client() is None:
+        return {"status": "unavailable", "latency_ms": None}
+    t0 = time.perf_counter()
+    ok = await _call(lambda r: r.ping())
+    if ok is None:
+        status = "open" if _breaker.state != "closed" else "error"
+        return {"status": status, "latency_ms": None, "breaker": _breaker.snapshot()}
+    return {"status": "ok", "latency_ms": round((time.perf_counter() - t0) * 1000, 2)}
+
+
+async def mget_json(*keys: str) -> Optional[list[Any]]:
+    """One MGET for all keys, JSON-decoded (None per missing key); None if Redis is unavailable."""
+    if not keys:
+        return []
+    raw = await _call(lambda r: r.mget(keys))
+    if raw is None:
+        return None
+    try:
+        return [json.loads(v) if v is not None else None for v in raw]
+    except ValueError:
+        return None  # corrupt entry: treat as a cache miss
+
+
+async def set_json_many(items: dict[str, Any], ex: Optional[int] = None) -> bool:
+    """SET every key (JSON-encoded) in one non-transactional pipeline round trip."""
+    if not items:
+        return True
+
+    async def op(r):
+        async with r.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, json.dumps(value), ex=ex)
+            return await pipe.execute()
+
+    return await _call(op) is not None
+
+
+async def close() -> None:
+    global _client
+    if _client:
+        try:
+            await _client.aclose()
+            await _client.connection_pool.disconnect()
+        except Exception:
+            pass
+    _client = None
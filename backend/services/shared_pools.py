@@ -0,0 +1,226 @@
+"""
+Pool snapshot in shared memory, shared by all uvicorn workers of a host.
+
+One process (the publisher) packs each pool snapshot (PoolTable columns) into an immutable shared-memory segment
+`<POOL_SHM_NAME>_<version>` and then bumps the version in a small header segment `<POOL_SHM_NAME>`.
+Workers read the header and map the current segment zero-copy (numpy views over the buffer).
+The publisher unlinks the previous segment, but a worker that still maps it keeps a valid view
+until it moves to the next version.
+
+Roles (settings.POOL_SHM_MODE):
+- "off": every worker fetches pools itself (default).
+- "auto": the worker holding an exclusive file lock publishes, the others read; a reader
+  takes over if the publisher exits.
+- "reader": never publish; run `python -m services.shared_pools` as the refresher process.
+"""
+
+import json
+import os
+import struct
+import tempfile
+import time
+from multiprocessing import shared_memory
+from typing import Any, Optional
+
+import numpy as np
+
+from core.config import settings
+from services.pool_table import PoolTable
+
+# Data segment header: version, n_pools, meta_len, fetched_at, block_number (-1 = unknown)
+_DATA_HEADER = struct.Struct("<QQQdq")
+_VERSION = struct.Struct("<Q")
+
+_role: Optional[str] = None  # "publisher" | "reader" | None (off)
+_lock_fd: Optional[int] = None
+_header: Optional[shared_memory.SharedMemory] = None
+_published: Optional[shared_memory.SharedMemory] = None  # publisher: segment of the current version
+_attached: Optional["SharedPoolSnapshot"] = None  # reader: snapshot currently mapped
+_retired: list["SharedPoolSnapshot"] = []  # older snapshots whose views were still referenced at release
+
+
+def _open_segment(name: str, create: bool = False, size: int = 0, track: bool = True) -> shared_memory.SharedMemory:
+    """Open/create a segment; track=False keeps the resource tracker from unlinking it at process exit."""
+    if track:
+        return shared_memory.SharedMemory(name=name, create=create, size=size)
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    except TypeError:  # Python < 3.13: no track argument
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _aligned(n: int) -> int:
+    return (n + 7) & ~7
+
+
+# Column order in a data segment: (PoolTable attribute, dtype)
+_COLUMNS = (
+    ("token0", np.int32),
+    ("token1", np.int32),
+    ("fee_bps", np.int32),
+    ("reserve0", np.float64),
+    ("reserve1", np.float64),
+)
+
+
+class SharedPoolSnapshot:
+    """Read-only view of one published snapshot; `table` columns are zero-copy views into shared memory."""
+
+    __slots__ = ("version", "fetched_at", "block_number", "table", "_shm", "_dicts")
+
+    def __init__(self, version: int, shm: shared_memory.SharedMemory):
+        _, n, meta_len, fetched_at, block = _DATA_HEADER.unpack_from(shm.buf, 0)
+        off = _aligned(_DATA_HEADER.size)
+        columns = {}
+        for name, dtype in _COLUMNS:
+            columns[name] = np.frombuffer(shm.buf, dtype=dtype, count=n, offset=off)
+            off += _aligned(n * np.dtype(dtype).itemsize)
+        meta = json.loads(bytes(shm.buf[off:off + meta_len]))
+        self.table = PoolTable(meta["tokens"], meta["addresses"], **columns)
+        self.version = version
+        self.fetched_at = fetched_at
+        self.block_number = block if block >= 0 else None
+        self._shm = shm
+        self._dicts: Optional[list[dict[str, Any]]] = None
+
+    def release(self) -> bool:
+        """Drop the array views and unmap; False while views handed out elsewhere are still alive."""
+        self.table = None
+        try:
+            self._shm.close()
+        except BufferError:
+            return False
+        return True
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """Pool dicts, built once per snapshot version and shared by all callers (do not mutate)."""
+        if self._dicts is None:
+            self._dicts = self.table.to_dicts()
+        return self._dicts
+
+
+def publish(pools: list[dict], block_number: Optional[int] = None) -> int:
+    """Publisher: write pools as a new version and point the header at it. Returns the version."""
+    global _header, _published
+    if _header is None:
+        try:
+            _header = _open_segment(settings.POOL_SHM_NAME, create=True, size=_VERSION.size, track=False)
+            _VERSION.pack_into(_header.buf, 0, 0)
+        except FileExistsError:
+            # Previous publisher's header: keep counting from its version so readers see a change
+            _header = _open_segment(settings.POOL_SHM_NAME, track=False)
+    version = _VERSION.unpack_from(_header.buf, 0)[0] + 1
+
+    table = PoolTable.from_pools(pools)
+    meta = json.dumps({"tokens": table.tokens, "addresses": table.addresses}).encode()
+    n = len(table)
+    size = _aligned(_DATA_HEADER.size) + sum(_aligned(n * np.dtype(dtype).itemsize) for _, dtype in _COLUMNS)
+    shm = _open_segment(f"{settings.POOL_SHM_NAME}_{version}", create=True, size=max(size + len(meta), 1))
+    _DATA_HEADER.pack_into(shm.buf, 0, version, n, len(meta), time.time(), -1 if block_number is None else block_number)
+    off = _aligned(_DATA_HEADER.size)
+    for name, dtype in _COLUMNS:
+        column = getattr(table, name).astype(dtype, copy=False)
+        shm.buf[off:off + column.nbytes] = column.tobytes()
+        off += _aligned(column.nbytes)
+    shm.buf[off:off + len(meta)] = meta
+
+    _VERSION.pack_into(_header.buf, 0, version)
+    if _published is not None:
+        _published.close()
+        _published.unlink()
+    _published = shm
+    return version
+
+
+def attach() -> Optional[SharedPoolSnapshot]:
+    """Reader: current snapshot, re-mapped only when the published version changed; None if nothing is published.
+
+    A returned snapshot's arrays stay valid until a later attach() moves to a newer version.
+    """
+    global _header, _attached
+    try:
+        if _header is None:
+            _header = _open_segment(settings.POOL_SHM_NAME, track=False)
+        version = _VERSION.unpack_from(_header.buf, 0)[0]
+        if _attached is not None and _attached.version == version:
+            return _attached
+        snapshot = SharedPoolSnapshot(version, _open_segment(f"{settings.POOL_SHM_NAME}_{version}", track=False))
+    except FileNotFoundError:
+        # Not published yet, or the publisher moved on between reading the header and mapping
+        return _attached
+    if _attached is not None:
+        _retired.append(_attached)
+    _retired[:] = [old for old in _retired if not old.release()]
+    _attached = snapshot
+    return snapshot
+
+
+def ensure_role() -> Optional[str]:
+    """Resolve this process's role from POOL_SHM_MODE; in "auto" a reader retries the publisher lock."""
+    global _role, _lock_fd
+    mode = settings.POOL_SHM_MODE.strip().lower()
+    if mode not in ("auto", "reader") or _role == "publisher":
+        return _role
+    _role = "reader"
+    if mode == "auto":
+        import fcntl
+
+        path = os.path.join(tempfile.gettempdir(), f"{settings.POOL_SHM_NAME}.lock")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+        else:
+            _lock_fd, _role = fd, "publisher"
+    return _role
+
+
+def role() -> Optional[str]:
+    return _role
+
+
+def shared_pools_info() -> dict:
+    version = None
+    if _role == "publisher" and _header is not None:
+        version = _VERSION.unpack_from(_header.buf, 0)[0]
+    elif _attached is not None:
+        version = _attached.version
+    return {"mode": settings.POOL_SHM_MODE, "role": _role, "version": version}
+
+
+def close() -> None:
+    """Publisher: unlink the current data segment (readers fall back to fetching); release the lock."""
+    global _published, _lock_fd
+    if _published is not None:
+        _published.close()
+        _published.unlink()
+        _published = None
+    if _lock_fd is not None:
+        os.close(_lock_fd)
+        _lock_fd = None
+
+
+async def _refresher() -> None:
+    """Standalone refresher: fetch pools every POOL_CACHE_TTL_SECONDS and publish them."""
+    import asyncio
+    from services.pharos_fetcher import get_pharos_fetcher
+
+    fetcher = get_pharos_fetcher()
+    try:
+        while True:
+            pools = await fetcher.get_pools()
+            publish(pools, fetcher.snapshot_info()["block_number"])
+            await asyncio.sleep(settings.POOL_CACHE_TTL_SECONDS)
+    finally:
+        close()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(_refresher())
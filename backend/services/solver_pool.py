@@ -0,0 +1,178 @@
+"""
+Solver pool: runs the CPU-bound solve_* coroutines on a bounded thread pool so they do not
+block the event loop, and tracks queue depth for readiness/backpressure.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+from core.config import settings
+from core.profiling import profile_solver
+from core.tracing import record_span
+from services.persistence import record_run
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+_queued = 0  # submitted, waiting for a worker
+_running = 0  # currently executing on a worker
+_STOP_POLL_SECONDS = 0.1  # how often a producer blocked on a full stream queue checks for a closed consumer
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.SOLVER_POOL_WORKERS),
+            thread_name_prefix="solver",
+        )
+    return _executor
+
+
+def queue_stats() -> dict:
+    return {
+        "queued": _queued,
+        "running": _running,
+        "workers": max(1, settings.SOLVER_POOL_WORKERS),
+        "max_queue_depth": settings.SOLVER_QUEUE_MAX_DEPTH,
+    }
+
+
+def is_overloaded() -> bool:
+    return _queued > settings.SOLVER_QUEUE_MAX_DEPTH
+
+
+@contextmanager
+def _worker_slot():
+    """Move one submission from queued to running for the duration of the block."""
+    global _queued, _running
+    with _lock:
+        _queued -= 1
+        _running += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _running -= 1
+
+
+def _submit() -> None:
+    global _queued
+    with _lock:
+        _queued += 1
+
+
+def _run_in_worker(solve: Callable[..., Awaitable[Any]], args: tuple) -> tuple[Any, float]:
+    with _worker_slot():
+        started = time.perf_counter()
+        # solve_* are declared async for API symmetry but never await; run them on a private loop.
+        with profile_solver(solve.__name__):
+            return asyncio.run(solve(*args)), started
+
+
+def _timings(submitted: float, started: Optional[float]) -> dict:
+    done = time.perf_counter()
+    if started is None:
+        return {"queue_ms": None, "solve_ms": None, "total_ms": round((done - submitted) * 1000, 2)}
+    return {"queue_ms": round((started - submitted) * 1000, 2), "solve_ms": round((done - started) * 1000, 2)}
+
+
+async def run_solver(solve: Callable[..., Awaitable[Any]], *args: Any, record: bool = True) -> Any:
+    """Run a solve_* coroutine function on the solver pool and await its result (recorded unless record=False).
+
+    The solver runs in a copy of the caller's context, so its log records carry the request trace id
+    and a profiled request (core.profiling) profiles it.
+    """
+    _submit()
+    submitted = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    try:
+        result, started = await loop.run_in_executor(_get_executor(), ctx.run, _run_in_worker, solve, args)
+    except Exception as e:
+        timings = _timings(submitted, None)
+        record_span("solver", timings["total_ms"], solver=solve.__name__, status="error")
+        if record:
+            record_run(solve.__name__, args, {"error": str(e)}, "error", timings)
+        raise
+    timings = _timings(submitted, started)
+    record_span("solver", timings["queue_ms"] + timings["solve_ms"], solver=solve.__name__, status="ok", **timings)
+    if record:
+        record_run(solve.__name__, args, result, "ok", timings)
+    return result
+
+
+async def stream_solver(stream: Callable[..., Iterator[Any]], *args: Any) -> AsyncIterator[Any]:
+    """Run a sync stream_* generator on the solver pool, yielding its items as they are produced.
+
+    The hand-off queue is bounded (SOLVER_STREAM_BUFFER), so a slow client pauses the solver instead
+    of the server buffering the whole result; closing the iterator stops the producer.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.SOLVER_STREAM_BUFFER))
+    stop = threading.Event()
+
+    def put(kind: str, value: Any) -> bool:
+        """Hand an event to the consumer; False (event dropped) once the consumer has closed."""
+        pending = asyncio.run_coroutine_threadsafe(queue.put((kind, value)), loop)
+        while True:
+            try:
+                pending.result(timeout=_STOP_POLL_SECONDS)
+                return True
+            except FutureTimeout:
+                if stop.is_set():
+                    pending.cancel()
+                    return False
+
+    submitted = time.perf_counter()
+    started: list[float] = []
+    last: list[Any] = [None]  # final event payload, recorded as the run's result
+
+    def produce() -> None:
+        with _worker_slot():
+            started.append(time.perf_counter())
+            try:
+                for item in stream(*args):
+                    if stop.is_set() or not put("item", item):
+                        return
+                if stop.is_set():
+                    return
+                put("done", None)
+            except Exception as e:
+                if not stop.is_set():
+                    try:
+                        put("error", e)
+                    except Exception:
+                        pass  # event loop gone (shutdown)
+
+    _submit()
+    loop.run_in_executor(_get_executor(), contextvars.copy_context().run, produce)
+    status = "cancelled"
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "done":
+                status = "ok"
+                break
+            if kind == "error":
+                status, last[0] = "error", {"error": str(value)}
+                raise value
+            last[0] = value[1] if isinstance(value, tuple) and len(value) == 2 else value
+            yield value
+    finally:
+        record_run(stream.__name__, args, last[0], status, _timings(submitted, started[0] if started else None))
+        stop.set()
+        # Unblock a producer waiting on a full queue so it can observe `stop`
+        while not queue.empty():
+            queue.get_nowait()
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
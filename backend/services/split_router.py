@@ -0,0 +1,122 @@
+"""
+Split-order routing: allocate amount_in across the top-k swap paths.
+
+Iterative water-filling over the composed constant-product curves: amount_in is pushed in equal
+chunks, each chunk going to the path with the highest marginal output given the reserves already
+moved by earlier chunks. Pools shared between paths (and parallel pools on one hop) therefore see
+the combined price impact, and marginal outputs equalize across the used paths up to chunk size.
+"""
+
+import heapq
+from typing import Optional
+
+from models.quantum import SplitRoute, TransactionRef
+from services.budget import Deadline
+from services.path_cache import iter_candidate_paths
+
+
+def top_k_paths(
+    G, token_in: int, token_out: int, amount: float, max_hops: int, k: int, deadline: Optional[Deadline] = None
+) -> list[list[int]]:
+    """The k simple paths with the highest output for `amount` (best parallel pool per hop)."""
+    from services.quantum_simulator import _swap_path_out
+
+    heap: list[tuple[float, int, list[int]]] = []
+    for n, path in enumerate(iter_candidate_paths(G, token_in, token_out, max_hops, deadline)):
+        if deadline is not None and deadline.expired():
+            break
+        out = _swap_path_out(G, path, amount)
+        if out <= 0:
+            continue
+        if len(heap) < k:
+            heapq.heappush(heap, (out, n, path))
+        elif out > heap[0][0]:
+            heapq.heapreplace(heap, (out, n, path))
+    return [path for _, _, path in sorted(heap, reverse=True)]
+
+
+def _pool_state(G, paths: list[list[int]]) -> dict[str, dict[int, float]]:
+    """Mutable reserves per pool address, keyed by token node, for every pool on the candidate paths."""
+    state: dict[str, dict[int, float]] = {}
+    for path in paths:
+        for u, v in zip(path, path[1:]):
+            for address, r_in, r_out, _ in G[u][v]["pools"]:
+                if address not in state:
+                    state[address] = {u: r_in, v: r_out}
+    return state
+
+
+def _push(G, state: dict, path: list[int], amount: float, flows: Optional[list[dict]] = None) -> float:
+    """Swap `amount` along path at current reserves; with `flows`, apply it (update reserves, record per-hop pool inputs)."""
+    amt = amount
+    for i, (u, v) in enumerate(zip(path, path[1:])):
+        best_out, best_pool = 0.0, None
+        for address, _, _, fee in G[u][v]["pools"]:
+            r = state[address]
+            denom = r[u] + amt * fee
+            if denom <= 0:
+                continue
+            out = (amt * r[v] * fee) / denom
+            if out > best_out:
+                best_out, best_pool = out, address
+        if best_pool is None:
+            return 0.0
+        if flows is not None:
+            r = state[best_pool]
+            r[u] += amt
+            r[v] -= best_out
+            flows[i][best_pool] = flows[i].get(best_pool, 0.0) + amt
+        amt = best_out
+    return amt
+
+
+def split_order(
+    G, tokens: list[str], paths: list[list[int]], amount_in: float, steps: int, deadline: Optional[Deadline] = None
+) -> tuple[list[SplitRoute], float]:
+    """Water-fill amount_in over `paths` (graph nodes; `tokens` spells them in the routes).
+
+    Returns (routes with non-zero allocation, total amount_out).
+
+    Anytime: if the deadline expires, the unallocated remainder goes to the currently best path in one chunk.
+    """
+    if not paths or amount_in <= 0:
+        return [], 0.0
+    state = _pool_state(G, paths)
+    allocated = [0.0] * len(paths)
+    received = [0.0] * len(paths)
+    flows = [[{} for _ in range(len(p) - 1)] for p in paths]
+
+    chunk = amount_in / max(1, steps)
+    remaining = amount_in
+    while remaining > 1e-12:
+        size = min(chunk, remaining)
+        if deadline is not None and deadline.expired():
+            size = remaining
+        best_i, best_out = -1, 0.0
+        for i, path in enumerate(paths):
+            out = _push(G, state, path, size)
+            if out > best_out:
+                best_i, best_out = i, out
+        if best_i < 0:
+            break
+        received[best_i] += _push(G, state, paths[best_i], size, flows[best_i])
+        allocated[best_i] += size
+        remaining -= size
+
+    routes = []
+    for i, path in enumerate(paths):
+        if allocated[i] <= 0:
+            continue
+        transactions = [
+            TransactionRef(pool=address, action="swap", amount=round(amt, 8))
+            for hop in flows[i]
+            for address, amt in hop.items()
+        ]
+        routes.append(SplitRoute(
+            path=[tokens[t] for t in path],
+            amount_in=round(allocated[i], 8),
+            amount_out=round(received[i], 8),
+            share_pct=round(allocated[i] / amount_in * 100, 2),
+            transactions=transactions,
+        ))
+    return routes, sum(received)
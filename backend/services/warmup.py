@@ -0,0 +1,85 @@
+"""
+Solver warm-up: pre-import the heavy solver stack and run one solve on demo data at startup,
+so the first real request after a deploy does not pay import and sampler first-use cost.
+
+Mode is controlled by settings.SOLVER_STARTUP_MODE ("warm" or "lean").
+"""
+
+import asyncio
+import time
+
+from core.config import settings
+
+_state: dict = {
+    "status": "pending",  # pending -> warming -> ready | failed
+    "mode": settings.SOLVER_STARTUP_MODE,
+    "warmup_ms": None,
+    "error": None,
+}
+
+
+def get_warmup_state() -> dict:
+    return dict(_state)
+
+
+def is_warm() -> bool:
+    """True once the solver stack is usable without cold-start cost (always true in lean mode)."""
+    return settings.lean_mode or _state["status"] in ("ready", "failed")
+
+
+def _import_solver_stack() -> None:
+    """Import networkx/dimod/neal and create the shared sampler and web3 client."""
+    import networkx  # noqa: F401
+    import dimod  # noqa: F401
+    from services.quantum_simulator import _get_sampler
+    from services.pharos_fetcher import _get_web3
+
+    _get_sampler()
+    _get_web3()
+
+
+def _warm_solvers() -> None:
+    """First solve on demo data (JIT-style): touches every code path a real request uses."""
+    from models.quantum import PendingOrder
+    from services.pool_table import PoolTable
+    from services.demo_pools import get_extended_demo_pools, TOKEN_USDC, TOKEN_USDT
+    from services.quantum_simulator import (
+        _arbitrage_qubo_classical,
+        _arbitrage_classical_baseline,
+        _build_pool_graph,
+        _anneal_path_qubo,
+        _build_conflict_matrix,
+        _schedule_orders_classical,
+    )
+
+    table = PoolTable.from_pools(get_extended_demo_pools())
+    G = _build_pool_graph(table)
+    usdc, usdt = table.node(TOKEN_USDC), table.node(TOKEN_USDT)
+    path, _, _, _, _ = _arbitrage_qubo_classical(G, usdc, usdt, 1000.0)
+    _arbitrage_classical_baseline(G, usdc, usdt, 1000.0)
+    _anneal_path_qubo(min(10, len(path) * 2))
+
+    orders = [
+        PendingOrder(id=f"warm_{i}", pair="USDC/USDT", account=f"0x{i}", writes=[f"pool_{i % 3}"])
+        for i in range(6)
+    ]
+    _schedule_orders_classical(orders, _build_conflict_matrix(orders)[0])
+
+
+async def warm_up_solvers() -> None:
+    """Run import + first solve in a worker thread so /api/health stays responsive meanwhile."""
+    if settings.lean_mode:
+        _state["status"] = "ready"
+        _state["warmup_ms"] = 0.0
+        return
+    _state["status"] = "warming"
+    t0 = time.perf_counter()
+    try:
+        await asyncio.to_thread(_import_solver_stack)
+        await asyncio.to_thread(_warm_solvers)
+        _state["status"] = "ready"
+    except Exception as e:
+        # Solvers import lazily anyway; a failed warm-up must not keep the instance out of rotation.
+        _state["status"] = "failed"
+        _state["error"] = str(e)
+    _state["warmup_ms"] = round((time.perf_counter() - t0) * 1000, 2)
@@ -0,0 +1,117 @@
+"""Persistence against the SQLite stand-in: row contents, bounded queue, batched flush loop."""
+
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from core.config import settings
+from services import persistence
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = tmp_path / "qhda.db"
+    monkeypatch.setattr(settings, "PERSIST_ENABLED", True)
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{path}")
+    monkeypatch.setattr(settings, "PERSIST_QUEUE_SIZE", 100)
+    monkeypatch.setattr(settings, "PERSIST_BATCH_SIZE", 500)
+    monkeypatch.setattr(settings, "POOL_SNAPSHOT_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(persistence, "_pending", persistence.deque())
+    monkeypatch.setattr(persistence, "_stats", {"written": 0, "dropped": 0, "failed": 0, "last_flush_at": None, "last_error": None})
+    monkeypatch.setattr(persistence, "_sink", None)
+    monkeypatch.setattr(persistence, "_wake", None)
+    monkeypatch.setattr(persistence, "_last_snapshot_at", 0.0)
+    yield path
+    if persistence._sink is not None:
+        asyncio.run(persistence._sink.close())
+
+
+def _select(path, sql: str) -> list[tuple]:
+    with sqlite3.connect(path) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def _run(i: int = 0) -> None:
+    result = {"value": i, "budget_exhausted": i % 2 == 1, "quantum_metrics": {"solver_ms": 1.5, "time_budget_ms": 100}}
+    persistence.record_run("solve_test", ({"n": i},), result, "ok", {"queue_ms": 0.25, "solve_ms": 1.75})
+
+
+def test_record_run_row(db):
+    _run(1)
+    assert asyncio.run(persistence.flush()) == 1
+
+    (row,) = _select(db, "SELECT solver, status, request, result, budget_exhausted, queue_ms, solve_ms, stage_timings FROM solver_runs")
+    solver, status, request, result, exhausted, queue_ms, solve_ms, stages = row
+    assert (solver, status, exhausted, queue_ms, solve_ms) == ("solve_test", "ok", 1, 0.25, 1.75)
+    assert json.loads(request) == {"n": 1}
+    assert json.loads(result)["value"] == 1
+    # queue/solve wall time plus the solver's *_ms metrics, without the budget setting
+    assert json.loads(stages) == {"queue_ms": 0.25, "solve_ms": 1.75, "solver_ms": 1.5}
+
+
+def test_record_pool_snapshot_row_and_interval(db):
+    pools = [{"address": "0x1", "tokens": ["A", "B"], "reserves": [1.0, 2.0], "fee": 300}]
+    persistence.record_pool_snapshot(pools, 42)
+    persistence.record_pool_snapshot(pools, 43)  # inside POOL_SNAPSHOT_INTERVAL_SECONDS: skipped
+    asyncio.run(persistence.flush())
+
+    rows = _select(db, "SELECT block_number, pool_count, pools FROM pool_snapshots")
+    assert [(r[0], r[1]) for r in rows] == [(42, 1)]
+    assert json.loads(rows[0][2]) == pools
+
+
+def test_disabled_records_nothing(db, monkeypatch):
+    monkeypatch.setattr(settings, "PERSIST_ENABLED", False)
+    _run()
+    persistence.record_pool_snapshot([], None)
+    assert len(persistence._pending) == 0
+
+
+def test_full_queue_drops_new_records(db, monkeypatch):
+    monkeypatch.setattr(settings, "PERSIST_QUEUE_SIZE", 3)
+    for i in range(5):
+        _run(i)
+    stats = persistence.persistence_stats()
+    assert (stats["queued"], stats["dropped"]) == (3, 2)
+
+    asyncio.run(persistence.flush())
+    # the oldest records were kept, the overflow was dropped
+    assert [json.loads(r[0]) for r in _select(db, "SELECT request FROM solver_runs ORDER BY created_at")] == [{"n": 0}, {"n": 1}, {"n": 2}]
+
+
+def test_flush_loop_writes_full_batches_early(db, monkeypatch):
+    monkeypatch.setattr(settings, "PERSIST_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "PERSIST_FLUSH_INTERVAL_SECONDS", 60)  # only a full batch wakes the loop
+    batches = []
+    write = persistence._SQLiteSink.write
+
+    async def recording_write(self, runs, snapshots):
+        batches.append(len(runs) + len(snapshots))
+        await write(self, runs, snapshots)
+
+    monkeypatch.setattr(persistence._SQLiteSink, "write", recording_write)
+
+    async def scenario():
+        task = asyncio.create_task(persistence.flush_loop())
+        await asyncio.sleep(0)  # loop installs its wake event
+        for i in range(5):
+            _run(i)
+        for _ in range(200):
+            if persistence._stats["written"] >= 4:
+                break
+            await asyncio.sleep(0.01)
+        written_before_stop = persistence._stats["written"]
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return written_before_stop
+
+    written_before_stop = asyncio.run(scenario())
+    # 5 records, batch size 2: the loop woke without waiting out the 60 s interval,
+    # and cancelling it flushed the remainder before closing the sink
+    assert written_before_stop >= 4
+    assert batches[:2] == [2, 2] and sum(batches) == 5 and max(batches) <= 2
+    assert persistence._sink is None
+    assert _select(db, "SELECT COUNT(*) FROM solver_runs") == [(5,)]